@@ -1,32 +1,238 @@
 import os
+import json
 import argparse
-from PIL import Image
 
-def resize_images(folder_path, width, height, overwrite=False):
-    files = [f for f in os.listdir(folder_path) if os.path.isfile(os.path.join(folder_path, f))]
+from resizeengine import run_jobs, render_file, spec_suffix
 
-    for f in files:
-        path = os.path.join(folder_path, f)
-        try:
-            with Image.open(path) as img:
-                if img.size == (width, height):
-                    print(f"⏭ Skipping {f} (already {width}x{height})")
-                    continue
+# Picked up when walking a tree; a flat folder still tries every file
+IMAGE_EXTENSIONS = {".jpg", ".jpeg", ".png", ".gif", ".bmp", ".tif", ".tiff", ".webp"}
+MANIFEST_NAME = "renditions.json"
+OUTPUTS_NAME = ".changeresolution.json"  # Spec each output was made with
 
-                # Resize with high-quality resampling
-                resized = img.resize((width, height), Image.LANCZOS)
 
-                if overwrite:
-                    save_path = path
-                else:
-                    name, ext = os.path.splitext(f)
-                    save_path = os.path.join(folder_path, f"{name}_{width}x{height}{ext}")
+def up_to_date(path, save_path):
+    """True when save_path is a non-empty file at least as new as path."""
+    try:
+        src = os.stat(path)
+        dst = os.stat(save_path)
+    except OSError:
+        return False
+    return dst.st_size > 0 and dst.st_mtime_ns >= src.st_mtime_ns
 
-                resized.save(save_path)
-                print(f"✅ Resized {f} -> {save_path}")
 
-        except Exception as e:
-            print(f"⚠️ Skipping {f}: {e}")
+def iter_images(folder_path, recursive=False, skip=None):
+    """Yield paths relative to folder_path; skip is a folder left out of the walk."""
+    if not recursive:
+        for f in sorted(os.listdir(folder_path)):
+            if os.path.isfile(os.path.join(folder_path, f)):
+                yield f
+        return
+
+    for root, dirs, files in os.walk(folder_path):
+        dirs[:] = sorted(d for d in dirs if os.path.abspath(os.path.join(root, d)) != skip)
+        rel = os.path.relpath(root, folder_path)
+        for f in sorted(files):
+            if os.path.splitext(f)[1].lower() in IMAGE_EXTENSIONS:
+                yield f if rel == "." else os.path.join(rel, f)
+
+
+def load_outputs(path):
+    """{output path relative to the file: spec} written by earlier runs."""
+    try:
+        with open(path, encoding="utf8") as f:
+            return json.load(f)["outputs"]
+    except (OSError, ValueError, KeyError):
+        return {}
+
+
+def write_outputs(path, outputs):
+    temp = f"{path}.tmp"
+    with open(temp, "w", encoding="utf8") as f:
+        json.dump({"outputs": outputs}, f, indent=1, ensure_ascii=False)
+    os.replace(temp, path)
+
+
+def resize_images(folder_path, spec, overwrite=False, workers=None, recursive=False, output_root=None, force=False):
+    """
+    Resize the images in folder_path under spec (see resizeengine.plan_size).
+
+    With output_root, outputs keep their names and relative paths under it,
+    and images already at their target size are copied there; otherwise
+    outputs are written next to the source with a suffix, or over it, and
+    such images are left alone.
+
+    The spec of every output is recorded in OUTPUTS_NAME, in output_root or
+    folder_path. Outputs made under the same spec and newer than their
+    source are skipped unless force, and recorded outputs are never taken
+    as sources.
+    """
+    skip = os.path.abspath(output_root) if output_root else None
+    suffix = spec_suffix(spec)
+    wanted = format_spec(spec)
+    record = None if overwrite else os.path.join(output_root or folder_path, OUTPUTS_NAME)
+    base = os.path.dirname(os.path.abspath(record)) if record else None
+    outputs = load_outputs(record) if record else {}
+    earlier = {os.path.normpath(os.path.join(base, p)) for p in outputs}
+
+    jobs = []
+    current = 0
+    for rel in iter_images(folder_path, recursive, skip):
+        path = os.path.join(folder_path, rel)
+        if os.path.abspath(path) in earlier or (record and os.path.abspath(path) == os.path.abspath(record)):
+            continue
+        name, ext = os.path.splitext(rel)
+        if output_root:
+            save_path = os.path.join(output_root, rel)
+        elif overwrite:
+            save_path = path
+        else:
+            save_path = os.path.join(folder_path, f"{name}{suffix}{ext}")
+
+        if record and not force:
+            made_with = outputs.get(os.path.relpath(save_path, base))
+            if made_with == wanted and up_to_date(path, save_path):
+                current += 1
+                continue
+        if output_root:
+            os.makedirs(os.path.dirname(save_path), exist_ok=True)
+        jobs.append((path, spec, save_path, bool(output_root)))
+
+    if current:
+        print(f"⏭ {current} files already up to date")
+
+    # Decoding and resampling run on a process pool, one chunk of files per task
+    try:
+        for message, written in run_jobs(jobs, workers):
+            print(message)
+            if written is not None and record:
+                outputs[os.path.relpath(written, base)] = wanted
+    finally:
+        # Keep what was done so far, so an interrupted run can resume
+        if record and jobs:
+            write_outputs(record, dict(sorted(outputs.items())))
+
+
+def load_manifest(path):
+    """{relative path: record} from an earlier manifest, with its rendition specs."""
+    try:
+        with open(path, encoding="utf8") as f:
+            manifest = json.load(f)
+        return manifest["renditions"], manifest["images"]
+    except (OSError, ValueError, KeyError):
+        return {}, {}
+
+
+def write_manifest(path, root, renditions, images):
+    temp = f"{path}.tmp"
+    with open(temp, "w", encoding="utf8") as f:
+        json.dump({"root": root, "renditions": renditions, "images": images}, f, indent=1, ensure_ascii=False)
+    os.replace(temp, path)
+
+
+def render_images(folder_path, renditions, workers=None, recursive=False, output_root=None, force=False, manifest=None):
+    """
+    Write every rendition in renditions ([(name, spec)]) of each image, from
+    one decode per image, and record them in a JSON manifest.
+
+    Outputs go to output_root/name/ when given, otherwise next to the source
+    with a _name suffix; files the manifest lists as outputs are never taken
+    as sources. Images whose outputs were all recorded under the
+    same specs and are newer than the source are skipped unless force.
+    """
+    skip = os.path.abspath(output_root) if output_root else None
+    manifest = manifest or os.path.join(output_root or folder_path, MANIFEST_NAME)
+    specs = {name: format_spec(spec) for name, spec in renditions}
+    previous_specs, previous = load_manifest(manifest)
+    # Outputs of earlier runs, which may sit among the sources
+    base = os.path.dirname(os.path.abspath(manifest))
+    earlier = {
+        os.path.normpath(os.path.join(base, output["path"]))
+        for record in previous.values()
+        for output in record.get("renditions", {}).values()
+    }
+    if previous_specs != specs:
+        previous = {}
+
+    images = {}
+    jobs = []
+    sources = {}
+    for rel in iter_images(folder_path, recursive, skip):
+        path = os.path.join(folder_path, rel)
+        stem, ext = os.path.splitext(rel)
+        if os.path.abspath(path) in earlier or os.path.abspath(path) == os.path.abspath(manifest):
+            continue
+
+        outputs = []
+        for name, spec in renditions:
+            if output_root:
+                save_path = os.path.join(output_root, name, rel)
+            else:
+                save_path = os.path.join(folder_path, f"{stem}_{name}{ext}")
+            outputs.append((name, spec, save_path))
+
+        if not force and rel in previous and all(up_to_date(path, save_path) for *_, save_path in outputs):
+            images[rel] = previous[rel]
+            continue
+        for *_, save_path in outputs:
+            os.makedirs(os.path.dirname(save_path) or ".", exist_ok=True)
+        jobs.append((path, outputs))
+        sources[path] = rel
+
+    if images:
+        print(f"⏭ {len(images)} files already up to date")
+
+    try:
+        for message, record in run_jobs(jobs, workers, func=render_file):
+            print(message)
+            if record is not None:
+                for output in record["renditions"].values():
+                    output["path"] = os.path.relpath(output["path"], base)
+                images[sources[record.pop("path")]] = record
+    finally:
+        # Keep what was done so far, so an interrupted run can resume
+        write_manifest(manifest, folder_path, specs, dict(sorted(images.items())))
+    print(f"Manifest written to {manifest}")
+
+
+def parse_box(value):
+    try:
+        width, height = (int(v) for v in value.lower().split("x"))
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"expected WIDTHxHEIGHT, got {value!r}")
+    return width, height
+
+
+def parse_spec(value):
+    """
+    A resize spec from "WxH", "fit:WxH", "fill:WxH", "longest:PX" or
+    "percent:P".
+    """
+    mode, _, arg = value.rpartition(":")
+    if mode in ("", "fit", "fill"):
+        return (mode or "exact",) + parse_box(arg)
+    try:
+        if mode == "longest":
+            return mode, int(arg)
+        if mode == "percent":
+            return mode, float(arg)
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"bad {mode} value {arg!r}")
+    raise argparse.ArgumentTypeError(f"unknown resize mode {mode!r}")
+
+
+def format_spec(spec):
+    if spec[0] == "exact":
+        return f"{spec[1]}x{spec[2]}"
+    if spec[0] in ("fit", "fill"):
+        return f"{spec[0]}:{spec[1]}x{spec[2]}"
+    return f"{spec[0]}:{spec[1]:g}"
+
+
+def parse_rendition(value):
+    name, sep, spec = value.partition("=")
+    if not sep or not name or os.sep in name:
+        raise argparse.ArgumentTypeError(f"expected NAME=SPEC, got {value!r}")
+    return name, parse_spec(spec)
 
 
 def main():
@@ -34,12 +240,52 @@ def main():
         description="Resize all images in a folder to a given resolution. Skips images already at that resolution."
     )
     parser.add_argument("folder", help="Path to the folder with images")
-    parser.add_argument("width", type=int, help="Target width")
-    parser.add_argument("height", type=int, help="Target height")
+    parser.add_argument("width", type=int, nargs="?", help="Target width")
+    parser.add_argument("height", type=int, nargs="?", help="Target height")
+    mode = parser.add_mutually_exclusive_group()
+    mode.add_argument("--fit", type=parse_box, metavar="WxH", help="Shrink to fit within WxH, keeping the aspect ratio")
+    mode.add_argument("--fill", type=parse_box, metavar="WxH", help="Scale to cover WxH and crop the centre")
+    mode.add_argument("--longest", type=int, metavar="PX", help="Shrink so the longest edge is PX")
+    mode.add_argument("--percent", type=float, metavar="P", help="Scale both edges to P percent")
+    mode.add_argument(
+        "--rendition", type=parse_rendition, action="append", metavar="NAME=SPEC",
+        help="Write a rendition per image (repeatable), e.g. thumb=fill:150x150 large=longest:2048; "
+             "SPEC is WxH, fit:WxH, fill:WxH, longest:PX or percent:P",
+    )
+    parser.add_argument("--manifest", metavar="FILE", help=f"Rendition manifest (default: {MANIFEST_NAME} in the output folder)")
     parser.add_argument("-o", "--overwrite", action="store_true", help="Overwrite original files instead of saving new ones")
+    parser.add_argument("-r", "--recursive", action="store_true", help="Include images in subfolders")
+    parser.add_argument("--output-root", metavar="DIR", help="Write outputs under DIR, mirroring the folder tree")
+    parser.add_argument("-f", "--force", action="store_true", help="Redo outputs that are newer than their source")
+    parser.add_argument("-j", "--workers", type=int, help="Worker processes (default: one per CPU)")
 
     args = parser.parse_args()
-    resize_images(args.folder, args.width, args.height, args.overwrite)
+    if args.rendition:
+        if args.width is not None or args.overwrite:
+            parser.error("--rendition cannot be combined with width, height or --overwrite")
+        names = [name for name, _ in args.rendition]
+        if len(set(names)) != len(names):
+            parser.error("rendition names must be unique")
+        render_images(args.folder, args.rendition, args.workers, args.recursive, args.output_root, args.force, args.manifest)
+        return
+
+    modes = [m for m in ("fit", "fill", "longest", "percent") if getattr(args, m) is not None]
+    if args.width is not None and args.height is not None:
+        if modes:
+            parser.error(f"width and height cannot be combined with --{modes[0]}")
+        spec = ("exact", args.width, args.height)
+    elif args.width is not None:
+        parser.error("height is required with width")
+    elif modes:
+        value = getattr(args, modes[0])
+        spec = (modes[0],) + (value if isinstance(value, tuple) else (value,))
+    else:
+        parser.error("give width and height, or one of --fit, --fill, --longest, --percent, --rendition")
+
+    if args.overwrite and args.output_root:
+        parser.error("--overwrite and --output-root cannot be combined")
+
+    resize_images(args.folder, spec, args.overwrite, args.workers, args.recursive, args.output_root, args.force)
 
 
 if __name__ == "__main__":
@@ -0,0 +1,215 @@
+import os
+import math
+import shutil
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+from PIL import Image
+
+CHUNK_SIZE = 16  # Images handed to a worker process at once
+REDUCING_GAP = 2  # Keep at least this much headroom above the target before Lanczos
+
+
+def default_workers():
+    return os.cpu_count() or 1
+
+
+def plan_size(size, spec):
+    """
+    (output size, crop box) for an image of size under spec.
+
+    spec is one of ("exact", w, h), ("fit", w, h), ("fill", w, h),
+    ("longest", n) or ("percent", p). fit and longest never enlarge;
+    fill scales to cover w x h and crops the centre. The crop box is given
+    as fractions of the source (left, top, right, bottom), None for no crop.
+    """
+    width, height = size
+    mode = spec[0]
+    if mode == "exact":
+        return (spec[1], spec[2]), None
+
+    if mode == "fill":
+        target = (spec[1], spec[2])
+        scale = max(target[0] / width, target[1] / height)
+        left = (1 - target[0] / scale / width) / 2
+        top = (1 - target[1] / scale / height) / 2
+        return target, (left, top, 1 - left, 1 - top)
+
+    if mode == "fit":
+        scale = min(spec[1] / width, spec[2] / height, 1)
+    elif mode == "longest":
+        scale = min(spec[1] / max(width, height), 1)
+    elif mode == "percent":
+        scale = spec[1] / 100
+    else:
+        raise ValueError(f"Unknown resize mode {mode!r}")
+    return (max(1, round(width * scale)), max(1, round(height * scale))), None
+
+
+def spec_suffix(spec):
+    """File name suffix for outputs written next to their source."""
+    mode = spec[0]
+    if mode == "exact":
+        return f"_{spec[1]}x{spec[2]}"
+    if mode in ("fit", "fill"):
+        return f"_{mode}{spec[1]}x{spec[2]}"
+    if mode == "longest":
+        return f"_{spec[1]}px"
+    return f"_{spec[1]:g}pct"
+
+
+def load_reduced(img, size):
+    """
+    Shrink img cheaply to no less than REDUCING_GAP times size.
+
+    JPEGs are decoded straight at 1/2, 1/4 or 1/8 scale by draft(); other
+    formats are box-reduced by an integer factor. Lanczos then only has to
+    cover the last step, at a fraction of the cost and without visible
+    loss.
+    """
+    width = math.ceil(size[0] * REDUCING_GAP)
+    height = math.ceil(size[1] * REDUCING_GAP)
+    if img.format == "JPEG":
+        img.draft(img.mode, (width, height))
+
+    factor = min(img.width // width, img.height // height)
+    if factor > 1:
+        return img.reduce(factor)
+    return img
+
+
+def save_atomic(img, path, fmt):
+    """Write through a temp file in the same folder, then rename over path."""
+    folder, name = os.path.split(path)
+    temp = os.path.join(folder, f".{name}.{os.getpid()}.tmp")
+    try:
+        img.save(temp, format=fmt)
+        os.replace(temp, path)
+    except BaseException:
+        if os.path.exists(temp):
+            os.remove(temp)
+        raise
+
+
+def copy_atomic(path, save_path):
+    """Like save_atomic, for a source that needs no resizing."""
+    folder, name = os.path.split(save_path)
+    temp = os.path.join(folder, f".{name}.{os.getpid()}.tmp")
+    try:
+        shutil.copy2(path, temp)
+        os.replace(temp, save_path)
+    except BaseException:
+        if os.path.exists(temp):
+            os.remove(temp)
+        raise
+
+
+def full_size(size, box):
+    """Size the whole image has when its box region is scaled to size."""
+    if box is None:
+        return size
+    return size[0] / (box[2] - box[0]), size[1] / (box[3] - box[1])
+
+
+def resize_file(path, spec, save_path, mirror=False):
+    """
+    Resize one image; returns (message, save_path), save_path being None
+    when nothing was written. An image already at its target size is
+    skipped, or copied when save_path is in a mirrored output tree.
+    """
+    name = os.path.basename(path)
+    try:
+        with Image.open(path) as img:
+            size, box = plan_size(img.size, spec)
+            if img.size == size and box is None:
+                if not mirror:
+                    return f"⏭ Skipping {name} (already {size[0]}x{size[1]})", None
+                copy_atomic(path, save_path)
+                return f"⏭ Copied {name} (already {size[0]}x{size[1]})", save_path
+
+            fmt = img.format
+            # Reduce for the size the whole image would have at this scale
+            src = load_reduced(img, full_size(size, box))
+            region = None if box is None else (box[0] * src.width, box[1] * src.height, box[2] * src.width, box[3] * src.height)
+            # Resize with high-quality resampling
+            resized = src.resize(size, Image.LANCZOS, box=region)
+
+        save_atomic(resized, save_path, fmt)
+        return f"✅ Resized {name} -> {save_path}", save_path
+    except Exception as e:
+        return f"⚠️ Skipping {name}: {e}", None
+
+
+def render_file(path, renditions):
+    """
+    Write every rendition of one image from a single decode; returns
+    (message, record). renditions is a list of (name, spec, save_path).
+
+    Renditions are made largest first, each from the smallest full-frame
+    rendition made so far that still covers it, so only the first resize
+    works on the decoded source.
+    """
+    name = os.path.basename(path)
+    try:
+        with Image.open(path) as img:
+            fmt = img.format
+            source_size = img.size
+            plans = []
+            for rname, spec, save_path in renditions:
+                size, box = plan_size(source_size, spec)
+                plans.append((full_size(size, box), rname, spec, save_path, size, box))
+            plans.sort(key=lambda plan: plan[0][0] * plan[0][1], reverse=True)
+
+            widest = max(full[0] for full, *_ in plans)
+            tallest = max(full[1] for full, *_ in plans)
+            sources = [load_reduced(img, (widest, tallest))]
+
+            outputs = {}
+            for full, rname, spec, save_path, size, box in plans:
+                if size == source_size and box is None:
+                    copy_atomic(path, save_path)
+                    out = sources[0] if sources[0].size == size else None
+                else:
+                    covering = [s for s in sources if s.width >= full[0] and s.height >= full[1]]
+                    src = min(covering, key=lambda s: s.width * s.height) if covering else sources[0]
+                    region = None if box is None else (box[0] * src.width, box[1] * src.height, box[2] * src.width, box[3] * src.height)
+                    out = src if src.size == size and region is None else src.resize(size, Image.LANCZOS, box=region)
+                    save_atomic(out, save_path, fmt)
+
+                # Cropped or stretched renditions do not frame the whole image
+                if out is not None and box is None and spec[0] != "exact":
+                    sources.append(out)
+                outputs[rname] = {"path": save_path, "width": size[0], "height": size[1], "bytes": os.path.getsize(save_path)}
+
+        made = ", ".join(f"{r} {o['width']}x{o['height']}" for r, o in outputs.items())
+        record = {"path": path, "width": source_size[0], "height": source_size[1], "bytes": os.path.getsize(path), "renditions": outputs}
+        return f"✅ Rendered {name}: {made}", record
+    except Exception as e:
+        return f"⚠️ Skipping {name}: {e}", None
+
+
+def resize_chunk(jobs, func=resize_file):
+    """Run a list of jobs through func in a worker process."""
+    return [func(*job) for job in jobs]
+
+
+def run_jobs(jobs, workers=None, chunk_size=CHUNK_SIZE, func=resize_file):
+    """
+    Run jobs through func on a process pool, in chunks so the per-task IPC
+    is paid once per chunk. Yields results as chunks finish; for the
+    default resize_file, jobs are (path, spec, save_path, mirror) and
+    results are (message, written path).
+    """
+    chunks = [jobs[i:i + chunk_size] for i in range(0, len(jobs), chunk_size)]
+    if not chunks:
+        return
+
+    workers = min(workers or default_workers(), len(chunks))
+    if workers == 1:
+        for chunk in chunks:
+            yield from resize_chunk(chunk, func)
+        return
+
+    with ProcessPoolExecutor(workers) as pool:
+        futures = [pool.submit(resize_chunk, chunk, func) for chunk in chunks]
+        for future in as_completed(futures):
+            yield from future.result()
@@ -0,0 +1,242 @@
+import os
+import csv
+import json
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+
+from imageprobe import probe, pillow_extensions, default_workers
+
+SIZE_FACTOR = 4  # Files this many times smaller or larger than the folder median are outliers
+TOP_RESOLUTIONS = 5  # Resolutions listed per folder
+MAX_RESOLUTIONS = 1000  # Distinct resolutions tracked for the whole tree
+MAX_PRINTED = 5  # Outliers printed per folder without a report file
+
+
+def format_size(size):
+    for unit in ["B", "KB", "MB", "GB", "TB"]:
+        if size < 1024:
+            return f"{size:.1f} {unit}"
+        size /= 1024
+    return f"{size:.1f} PB"
+
+
+def size_bucket(size):
+    """Power-of-two size class, e.g. "64 KB-128 KB"."""
+    if size == 0:
+        return "0 B"
+    def power(bits):
+        unit = min(bits // 10, 5)
+        return f"{1 << (bits - 10 * unit)} {['B', 'KB', 'MB', 'GB', 'TB', 'PB'][unit]}"
+
+    bits = size.bit_length() - 1
+    return f"{power(bits)}-{power(bits + 1)}"
+
+
+class Histogram:
+    """Counters for one folder, or for the whole tree."""
+
+    def __init__(self):
+        self.files = 0
+        self.images = 0
+        self.bytes = 0
+        self.sizes = Counter()
+        self.formats = Counter()
+        self.modes = Counter()
+        self.resolutions = Counter()
+
+    def add(self, size, info):
+        self.files += 1
+        self.bytes += size
+        self.sizes[size_bucket(size)] += 1
+        if info is not None:
+            fmt, width, height, mode = info
+            self.images += 1
+            self.formats[fmt] += 1
+            self.modes[mode or "?"] += 1
+            self.resolutions[f"{width}x{height}"] += 1
+
+    def merge(self, other):
+        self.files += other.files
+        self.images += other.images
+        self.bytes += other.bytes
+        self.sizes.update(other.sizes)
+        self.formats.update(other.formats)
+        self.modes.update(other.modes)
+        self.resolutions.update(other.resolutions)
+        if len(self.resolutions) > MAX_RESOLUTIONS:
+            # Keep the heavy hitters; rare resolutions only matter as outliers
+            self.resolutions = Counter(dict(self.resolutions.most_common(MAX_RESOLUTIONS // 2)))
+
+    def to_dict(self):
+        return {
+            "files": self.files,
+            "images": self.images,
+            "bytes": self.bytes,
+            "sizes": dict(self.sizes),
+            "formats": dict(self.formats),
+            "modes": dict(self.modes),
+            "resolutions": dict(self.resolutions.most_common(TOP_RESOLUTIONS)),
+        }
+
+
+def iter_folders(root):
+    """Yield (folder, [(name, size)]) for every folder below root that has files."""
+    stack = [root]
+    while stack:
+        folder = stack.pop()
+        files = []
+        dirs = []
+        try:
+            with os.scandir(folder) as it:
+                for entry in it:
+                    try:
+                        if entry.is_dir(follow_symlinks=False):
+                            dirs.append(entry.path)
+                        elif entry.is_file():
+                            files.append((entry.name, entry.stat().st_size))
+                    except OSError:
+                        continue
+        except OSError as e:
+            print(f"Cannot read {folder}: {e}")
+            continue
+
+        if files:
+            files.sort()
+            yield folder, files
+        stack.extend(sorted(dirs, reverse=True))
+
+
+def find_outliers(files, infos, hist):
+    """Files that differ from what most of their folder looks like."""
+    common = {}
+    if hist.images >= 2:
+        common["format"] = hist.formats.most_common(1)[0][0]
+        common["mode"] = hist.modes.most_common(1)[0][0]
+        common["resolution"] = hist.resolutions.most_common(1)[0][0]
+    mostly_images = hist.images > hist.files / 2
+
+    sizes = sorted(size for (_, size), info in zip(files, infos) if info is not None)
+    median = sizes[len(sizes) // 2] if sizes else 0
+
+    outliers = []
+    for (name, size), info in zip(files, infos):
+        reasons = []
+        record = {"name": name, "size": size}
+        if info is None:
+            if mostly_images:
+                reasons.append("not an image")
+        else:
+            fmt, width, height, mode = info
+            values = {"format": fmt, "mode": mode or "?", "resolution": f"{width}x{height}"}
+            record.update(values)
+            reasons += [key for key, value in common.items() if values[key] != value]
+
+        if info is not None and len(sizes) >= 2 and median:
+            if size * SIZE_FACTOR < median or size > median * SIZE_FACTOR:
+                reasons.append("size")
+
+        if reasons:
+            record["reasons"] = reasons
+            outliers.append(record)
+    return common, outliers
+
+
+class ReportWriter:
+    """
+    Stream folder records to a JSON or CSV file, or to the terminal.
+
+    JSON: {"root", "directories": [per-folder counters and outliers],
+    "summary"}. CSV: one row per outlier. Nothing is kept once written.
+    """
+
+    CSV_FIELDS = ["directory", "name", "reasons", "size", "format", "resolution", "mode"]
+
+    def __init__(self, root, path=None):
+        self.root = root
+        self.path = path
+        self.kind = None if path is None else "csv" if path.lower().endswith(".csv") else "json"
+        self.first = True
+
+        if self.kind is not None:
+            self.f = open(path, "w", encoding="utf8", newline="")
+        if self.kind == "json":
+            self.f.write('{"root": ' + json.dumps(root) + ', "directories": [\n')
+        elif self.kind == "csv":
+            self.csv = csv.DictWriter(self.f, self.CSV_FIELDS)
+            self.csv.writeheader()
+
+    def write(self, folder, hist, common, outliers):
+        rel = os.path.relpath(folder, self.root)
+        if self.kind == "json":
+            record = {"path": rel, **hist.to_dict(), "common": common, "outliers": outliers}
+            self.f.write(("" if self.first else ",\n") + json.dumps(record, ensure_ascii=False))
+            self.first = False
+        elif self.kind == "csv":
+            for o in outliers:
+                self.csv.writerow({"directory": rel, **o, "reasons": ";".join(o["reasons"])})
+        elif outliers:
+            reasons = Counter(r for o in outliers for r in o["reasons"])
+            summary = ", ".join(f"{r} x{n}" for r, n in reasons.most_common())
+            print(f"❌ {rel}: {len(outliers)} of {hist.files} files stand out ({summary})")
+            for o in outliers[:MAX_PRINTED]:
+                print(f"  {o['name']}: {', '.join(o['reasons'])}")
+            if len(outliers) > MAX_PRINTED:
+                print(f"  ... and {len(outliers) - MAX_PRINTED} more")
+
+    def close(self, totals):
+        if self.kind == "json":
+            self.f.write("\n], \"summary\": " + json.dumps(totals.to_dict()) + "}\n")
+        if self.kind is not None:
+            self.f.close()
+
+
+def audit(root, report=None, workers=None):
+    """
+    Audit every folder below root, one folder at a time.
+
+    Only counters and the outliers of the current folder are held, so
+    memory depends on the largest folder rather than the whole tree.
+    Returns the tree-wide Histogram.
+    """
+    extensions = pillow_extensions()
+    totals = Histogram()
+    folders = outlier_count = 0
+    writer = ReportWriter(root, report)
+
+    skip = os.path.abspath(report) if report else None
+
+    try:
+        with ThreadPoolExecutor(workers or default_workers()) as pool:
+            for folder, files in iter_folders(root):
+                if skip is not None and os.path.dirname(skip) == os.path.abspath(folder):
+                    files = [f for f in files if os.path.join(os.path.dirname(skip), f[0]) != skip]
+                    if not files:
+                        continue
+                paths = [os.path.join(folder, name) for name, _ in files]
+                infos = list(pool.map(lambda p: probe(p, extensions), paths))
+
+                hist = Histogram()
+                for (_, size), info in zip(files, infos):
+                    hist.add(size, info)
+                common, outliers = find_outliers(files, infos, hist)
+
+                writer.write(folder, hist, common, outliers)
+                totals.merge(hist)
+                folders += 1
+                outlier_count += len(outliers)
+    finally:
+        writer.close(totals)
+
+    print(
+        f"ℹ️ {totals.files} files ({format_size(totals.bytes)}) in {folders} folders, "
+        f"{totals.images} images, {outlier_count} outliers"
+    )
+    for name, counter in [("Formats", totals.formats), ("Modes", totals.modes)]:
+        if counter:
+            print(f"  {name}: " + ", ".join(f"{k} {n}" for k, n in counter.most_common()))
+    if totals.resolutions:
+        top = totals.resolutions.most_common(TOP_RESOLUTIONS)
+        print("  Resolutions: " + ", ".join(f"{k} {n}" for k, n in top))
+    if report:
+        print(f"Report written to {report}")
+    return totals
@@ -1,18 +1,22 @@
 import os
 import argparse
-from PIL import Image
 
-def check_files(folder_path):
-    files = [f for f in os.listdir(folder_path) if os.path.isfile(os.path.join(folder_path, f))]
-    if not files:
-        print("No files found in the folder.")
-        return
+from imageprobe import probe_all
+from duplicates import find_duplicates, np, Image
+from audit import audit
 
+def check_files(folder_path, workers=None, duplicates=False, near=None, phash=False):
     # --- Check file sizes ---
     sizes = {}
-    for f in files:
-        path = os.path.join(folder_path, f)
-        sizes[f] = os.path.getsize(path)
+    with os.scandir(folder_path) as it:
+        for entry in it:
+            if entry.is_file():
+                sizes[entry.name] = entry.stat().st_size
+
+    files = sorted(sizes)
+    if not files:
+        print("No files found in the folder.")
+        return
 
     unique_sizes = set(sizes.values())
     if len(unique_sizes) == 1:
@@ -23,19 +27,18 @@ def check_files(folder_path):
             print(f"  {f}: {s} bytes")
 
     # --- Check image resolutions ---
+    # Headers only, on a thread pool; Pillow just for formats it alone knows
     resolutions = {}
-    for f in files:
-        path = os.path.join(folder_path, f)
-        try:
-            with Image.open(path) as img:
-                resolutions[f] = img.size  # (width, height)
-        except Exception:
-            continue  # skip non-images
+    paths = [os.path.join(folder_path, f) for f in files]
+    for f, (path, info) in zip(files, probe_all(paths, workers)):
+        if info is not None:
+            resolutions[f] = info[1:3]  # (width, height)
 
     if resolutions:
         unique_res = set(resolutions.values())
         if len(unique_res) == 1:
-            print(f"✅ All images have the same resolution: {unique_res.pop()[0]}x{unique_res.pop()[1]}")
+            width, height = unique_res.pop()
+            print(f"✅ All images have the same resolution: {width}x{height}")
         else:
             print("❌ Images have different resolutions:")
             for f, r in resolutions.items():
@@ -43,15 +46,68 @@ def check_files(folder_path):
     else:
         print("ℹ️ No images found in the folder.")
 
+    if duplicates:
+        report_duplicates(folder_path, files, resolutions, workers, near, phash)
+
+
+def report_duplicates(folder_path, files, resolutions, workers=None, near=None, phash=False):
+    if near is not None and (np is None or Image is None):
+        print("ℹ️ Near-duplicate detection needs Pillow and NumPy, skipping it.")
+        near = None
+
+    paths = [os.path.join(folder_path, f) for f in files]
+    images = {os.path.join(folder_path, f) for f in resolutions}
+    exact, similar = find_duplicates(
+        paths,
+        near=near,
+        kind="phash" if phash else "dhash",
+        workers=workers,
+        images=images,
+    )
+
+    if exact:
+        print(f"❌ {len(exact)} groups of identical files:")
+        for group in exact:
+            print("  " + ", ".join(os.path.basename(p) for p in group))
+    else:
+        print("✅ No identical files.")
+
+    if near is not None:
+        if similar:
+            print(f"❌ {len(similar)} groups of near-duplicate images:")
+            for group in similar:
+                print("  " + ", ".join(os.path.basename(p) for p in group))
+        else:
+            print("✅ No near-duplicate images.")
+
 
 def main():
     parser = argparse.ArgumentParser(
         description="Check if all files in a folder are the same size and if images have the same resolution."
     )
     parser.add_argument("folder", help="Path to the folder to check")
+    parser.add_argument("--workers", type=int, help="Threads reading image headers")
+    parser.add_argument("-d", "--duplicates", action="store_true", help="Also look for identical files")
+    parser.add_argument("--near", type=int, nargs="?", const=6, metavar="BITS",
+                        help="Also cluster visually similar images, at most BITS of 64 apart (default 6)")
+    parser.add_argument("--phash", action="store_true", help="Use the DCT hash instead of dHash for --near")
+    parser.add_argument("-r", "--recursive", action="store_true",
+                        help="Audit every subfolder, summarising each and listing only outliers")
+    parser.add_argument("--report", metavar="FILE",
+                        help="Write the recursive audit to FILE (.csv for outliers only, JSON otherwise)")
     args = parser.parse_args()
 
-    check_files(args.folder)
+    if args.recursive or args.report:
+        audit(args.folder, args.report, args.workers)
+        return
+
+    check_files(
+        args.folder,
+        args.workers,
+        duplicates=args.duplicates or args.near is not None,
+        near=args.near,
+        phash=args.phash,
+    )
 
 
 if __name__ == "__main__":
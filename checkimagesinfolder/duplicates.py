@@ -0,0 +1,292 @@
+import os
+import sqlite3
+import hashlib
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+
+try:
+    import numpy as np
+    from PIL import Image
+except ImportError:
+    np = Image = None
+
+CACHE_DB = os.path.join(os.path.expanduser("~"), ".cache", "filetools", "checkimagesinfolder", "hashes.sqlite")
+HEAD_BYTES = 64 * 1024
+CHUNK_SIZE = 1 << 20
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS hashes (
+    path TEXT NOT NULL,
+    kind TEXT NOT NULL,
+    size INTEGER NOT NULL,
+    mtime_ns INTEGER NOT NULL,
+    value BLOB,
+    PRIMARY KEY (path, kind)
+);
+"""
+
+
+def default_workers():
+    return min(32, (os.cpu_count() or 1) * 4)
+
+
+def head_hash(path):
+    with open(path, "rb") as f:
+        return hashlib.blake2b(f.read(HEAD_BYTES), digest_size=16).digest()
+
+
+def full_hash(path):
+    h = hashlib.blake2b(digest_size=16)
+    with open(path, "rb") as f:
+        while chunk := f.read(CHUNK_SIZE):
+            h.update(chunk)
+    return h.digest()
+
+
+def _thumbnail(path, size):
+    """Grayscale float array of the image scaled to size (w, h)."""
+    with Image.open(path) as img:
+        img.draft("L", (size[0] * 4, size[1] * 4))  # JPEG: decode at a fraction of full size
+        img = img.convert("L").resize(size, Image.BILINEAR)
+        return np.asarray(img, dtype=np.float32)
+
+
+def _bits(flags):
+    return int.from_bytes(np.packbits(flags.ravel()).tobytes(), "big")
+
+
+def dhash(path):
+    """64-bit difference hash: is each pixel brighter than its right neighbour."""
+    pixels = _thumbnail(path, (9, 8))
+    return _bits(pixels[:, 1:] > pixels[:, :-1])
+
+
+_DCT = {}
+
+
+def _dct_matrix(n):
+    if n not in _DCT:
+        k = np.arange(n)[:, None]
+        i = np.arange(n)[None, :]
+        _DCT[n] = np.cos(np.pi * (2 * i + 1) * k / (2 * n))
+    return _DCT[n]
+
+
+def phash(path):
+    """64-bit perceptual hash: low DCT frequencies against their median."""
+    pixels = _thumbnail(path, (32, 32))
+    m = _dct_matrix(32)
+    low = (m @ pixels @ m.T)[:8, :8]
+    return _bits(low > np.median(low.ravel()[1:]))  # DC term left out of the median
+
+
+def _perceptual(func):
+    def wrapped(path):
+        try:
+            return func(path).to_bytes(8, "big")
+        except OSError as e:
+            if e.errno is not None:
+                raise  # Could not read the file, which may be temporary
+            return None  # Pillow's decoding errors carry no errno
+        except Exception:
+            return None  # Not decodable as an image
+    return wrapped
+
+
+HASHES = {
+    "head": head_hash,
+    "full": full_hash,
+    "dhash": _perceptual(dhash),
+    "phash": _perceptual(phash),
+}
+
+
+class HashCache:
+    """
+    Persistent hashes keyed by path, reused while size and mtime match.
+
+    Files that could not be read get None and are not cached, so they are
+    tried again next time; only a perceptual hash of something that is not
+    an image is cached as None.
+    """
+
+    def __init__(self, db_path=CACHE_DB):
+        os.makedirs(os.path.dirname(db_path), exist_ok=True)
+        self.db = sqlite3.connect(db_path)
+        self.db.executescript(SCHEMA)
+
+    def close(self):
+        self.db.commit()
+        self.db.close()
+
+    def hashes(self, files, kind, pool):
+        """{path: hash} for files ({path: stat}), computing misses on pool."""
+        found = {}
+        missing = []
+        for path, st in files.items():
+            row = self.db.execute(
+                "SELECT value FROM hashes WHERE path = ? AND kind = ? AND size = ? AND mtime_ns = ?",
+                (path, kind, st.st_size, st.st_mtime_ns),
+            ).fetchone()
+            if row is not None:
+                found[path] = row[0]
+            else:
+                missing.append(path)
+
+        def compute(path):
+            try:
+                return HASHES[kind](path), True
+            except OSError:
+                return None, False
+
+        for path, (value, cacheable) in zip(missing, pool.map(compute, missing)):
+            st = files[path]
+            found[path] = value
+            if not cacheable:
+                continue
+            self.db.execute(
+                "INSERT OR REPLACE INTO hashes VALUES (?, ?, ?, ?, ?)",
+                (path, kind, st.st_size, st.st_mtime_ns, value),
+            )
+        self.db.commit()
+        return found
+
+
+def _collisions(values):
+    groups = defaultdict(list)
+    for path, value in values.items():
+        if value is not None:
+            groups[value].append(path)
+    return [g for g in groups.values() if len(g) > 1]
+
+
+def exact_duplicates(files, cache, pool):
+    """
+    Groups of identical files among files ({path: stat}).
+
+    Only same-size files have their first 64 KB hashed, and only files
+    whose heads also collide are hashed in full.
+    """
+    by_size = defaultdict(list)
+    for path, st in files.items():
+        by_size[st.st_size].append(path)
+    candidates = {p: files[p] for g in by_size.values() if len(g) > 1 for p in g}
+
+    heads = cache.hashes(candidates, "head", pool)
+    groups = []
+    suspects = {}
+    for group in _collisions(heads):
+        if files[group[0]].st_size <= HEAD_BYTES:
+            groups.append(group)  # The head is the whole file
+        else:
+            suspects.update((p, files[p]) for p in group)
+
+    groups += _collisions(cache.hashes(suspects, "full", pool))
+    return [sorted(g) for g in groups]
+
+
+class BKTree:
+    """Metric tree over integer hashes for Hamming-radius queries."""
+
+    def __init__(self):
+        self.root = None  # [hash, items, {distance: child}]
+
+    def add(self, value, item):
+        if self.root is None:
+            self.root = [value, [item], {}]
+            return
+        node = self.root
+        while True:
+            d = (value ^ node[0]).bit_count()
+            if d == 0:
+                node[1].append(item)
+                return
+            child = node[2].get(d)
+            if child is None:
+                node[2][d] = [value, [item], {}]
+                return
+            node = child
+
+    def search(self, value, radius):
+        """Items whose hash is within radius of value."""
+        found = []
+        stack = [self.root] if self.root is not None else []
+        while stack:
+            node = stack.pop()
+            d = (value ^ node[0]).bit_count()
+            if d <= radius:
+                found += node[1]
+            stack.extend(
+                child for dist, child in node[2].items()
+                if d - radius <= dist <= d + radius
+            )
+        return found
+
+
+def near_duplicates(files, cache, pool, kind="dhash", radius=6):
+    """
+    Clusters of visually similar images, by perceptual hash distance.
+
+    Returns groups of paths; files are joined when their hashes are at
+    most radius bits apart, transitively.
+    """
+    hashes = {
+        path: int.from_bytes(value, "big")
+        for path, value in cache.hashes(files, kind, pool).items()
+        if value is not None
+    }
+
+    tree = BKTree()
+    for path, value in hashes.items():
+        tree.add(value, path)
+
+    parent = {path: path for path in hashes}
+
+    def find(p):
+        while parent[p] != p:
+            parent[p] = parent[parent[p]]
+            p = parent[p]
+        return p
+
+    for path, value in hashes.items():
+        for other in tree.search(value, radius):
+            a, b = find(path), find(other)
+            if a != b:
+                parent[a] = b
+
+    clusters = defaultdict(list)
+    for path in hashes:
+        clusters[find(path)].append(path)
+    return [sorted(g) for g in clusters.values() if len(g) > 1]
+
+
+def find_duplicates(paths, near=None, kind="dhash", workers=None, images=None):
+    """
+    (exact groups, near-duplicate groups) among paths.
+
+    near is the Hamming radius for near-duplicates; None skips them. Only
+    paths in images (all of them by default) get a perceptual hash, and
+    near groups only list one file per exact group.
+    """
+    files = {}
+    for path in paths:
+        try:
+            files[path] = os.stat(path)
+        except OSError:
+            pass
+
+    cache = HashCache()
+    try:
+        with ThreadPoolExecutor(workers or default_workers()) as pool:
+            exact = exact_duplicates(files, cache, pool)
+            similar = []
+            if near is not None:
+                copies = {p for g in exact for p in g[1:]}
+                candidates = {
+                    p: st for p, st in files.items()
+                    if p not in copies and (images is None or p in images)
+                }
+                similar = near_duplicates(candidates, cache, pool, kind, near)
+    finally:
+        cache.close()
+    return exact, similar
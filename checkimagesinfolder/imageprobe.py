@@ -0,0 +1,200 @@
+import os
+import struct
+from concurrent.futures import ThreadPoolExecutor
+
+try:
+    from PIL import Image
+except ImportError:
+    Image = None
+
+HEADER_BYTES = 4096  # Enough for every format below except JPEG and TIFF, which seek
+
+# JPEG start-of-frame markers (C4, C8 and CC are not frames)
+SOF_MARKERS = {0xC0, 0xC1, 0xC2, 0xC3, 0xC5, 0xC6, 0xC7, 0xC9, 0xCA, 0xCB, 0xCD, 0xCE, 0xCF}
+
+# Colour modes, named like Pillow's
+PNG_MODES = {0: "L", 2: "RGB", 3: "P", 4: "LA", 6: "RGBA"}
+JPEG_MODES = {1: "L", 3: "RGB", 4: "CMYK"}
+TIFF_MODES = {0: "L", 1: "L", 2: "RGB", 3: "P", 5: "CMYK", 6: "RGB"}
+
+# "BM" alone is too weak a signature; the rest of the header has to add up
+BMP_HEADER_SIZES = {12, 40, 52, 56, 64, 108, 124}
+BMP_BIT_COUNTS = {1, 4, 8, 16, 24, 32}
+BMP_MAX_DIMENSION = 1 << 16
+
+
+def default_workers():
+    return min(32, (os.cpu_count() or 1) * 4)
+
+
+def _png(head, f):
+    if head[12:16] == b"IHDR" and len(head) >= 26:
+        width, height, depth, color = struct.unpack(">IIBB", head[16:26])
+        if color == 0 and depth in (1, 16):
+            mode = "1" if depth == 1 else "I;16"
+        else:
+            mode = PNG_MODES.get(color)
+        return width, height, mode
+    return None
+
+
+def _gif(head, f):
+    return struct.unpack("<HH", head[6:10]) + ("P",) if len(head) >= 10 else None
+
+
+def _bmp(head, f):
+    if len(head) < 30:
+        return None
+    (dib_size,) = struct.unpack("<I", head[14:18])
+    if dib_size not in BMP_HEADER_SIZES:
+        return None
+    if dib_size == 12:  # OS/2 BITMAPCOREHEADER
+        width, height, _, bits = struct.unpack("<HHHH", head[18:26])
+    else:
+        width, height, _, bits = struct.unpack("<iiHH", head[18:30])
+        height = abs(height)  # Negative height: stored top-down
+    if not (0 < width <= BMP_MAX_DIMENSION and 0 < height <= BMP_MAX_DIMENSION) or bits not in BMP_BIT_COUNTS:
+        return None
+    mode = "1" if bits == 1 else "P" if bits <= 8 else "RGB"
+    return width, height, mode
+
+
+def _webp(head, f):
+    chunk = head[12:16]
+    if chunk == b"VP8 " and len(head) >= 30:
+        width, height = struct.unpack("<HH", head[26:30])
+        return width & 0x3FFF, height & 0x3FFF, "RGB"
+    if chunk == b"VP8L" and len(head) >= 25:
+        b0, b1, b2, b3 = head[21:25]
+        width = 1 + (((b1 & 0x3F) << 8) | b0)
+        height = 1 + (((b3 & 0x0F) << 10) | (b2 << 2) | ((b1 & 0xC0) >> 6))
+        return width, height, "RGBA" if b3 & 0x10 else "RGB"
+    if chunk == b"VP8X" and len(head) >= 30:
+        width = 1 + int.from_bytes(head[24:27], "little")
+        height = 1 + int.from_bytes(head[27:30], "little")
+        return width, height, "RGBA" if head[20] & 0x10 else "RGB"
+    return None
+
+
+def _jpeg(head, f):
+    """Walk the segments up to the first frame header, seeking over the rest."""
+    f.seek(2)
+    while True:
+        byte = f.read(1)
+        while byte and byte != b"\xff":
+            byte = f.read(1)  # Resync on garbage between segments
+        while byte == b"\xff":
+            byte = f.read(1)  # Fill bytes
+        if not byte:
+            return None
+
+        marker = byte[0]
+        if marker in (0xD8, 0x01) or 0xD0 <= marker <= 0xD7:
+            continue  # No length field
+        if marker == 0xD9:
+            return None  # End of image without a frame
+
+        data = f.read(2)
+        if len(data) < 2:
+            return None
+        (length,) = struct.unpack(">H", data)
+        if marker in SOF_MARKERS:
+            frame = f.read(6)
+            if len(frame) < 6:
+                return None
+            height, width, components = struct.unpack(">HHB", frame[1:6])
+            return width, height, JPEG_MODES.get(components)
+        f.seek(length - 2, os.SEEK_CUR)
+
+
+def _tiff(head, f):
+    order = "<" if head[:2] == b"II" else ">"
+    (version,) = struct.unpack(order + "H", head[2:4])
+    if version != 42:
+        return None  # BigTIFF, left to Pillow
+
+    (offset,) = struct.unpack(order + "I", head[4:8])
+    f.seek(offset)
+    data = f.read(2)
+    if len(data) < 2:
+        return None
+    (count,) = struct.unpack(order + "H", data)
+    entries = f.read(12 * count)
+
+    # ImageWidth, ImageLength, PhotometricInterpretation, SamplesPerPixel
+    tags = {}
+    for i in range(0, len(entries) - 11, 12):
+        tag, kind = struct.unpack(order + "HH", entries[i:i + 4])
+        if tag in (256, 257, 262, 277):
+            if kind == 3:  # SHORT
+                (value,) = struct.unpack(order + "H", entries[i + 8:i + 10])
+            else:  # LONG
+                (value,) = struct.unpack(order + "I", entries[i + 8:i + 12])
+            tags[tag] = value
+    if 256 not in tags or 257 not in tags:
+        return None
+
+    mode = TIFF_MODES.get(tags.get(262))
+    if mode == "RGB" and tags.get(277) == 4:
+        mode = "RGBA"
+    return tags[256], tags[257], mode
+
+
+def sniff(head):
+    """(format, parser) for a known image signature, None otherwise."""
+    if head.startswith(b"\x89PNG\r\n\x1a\n"):
+        return "PNG", _png
+    if head.startswith(b"\xff\xd8"):
+        return "JPEG", _jpeg
+    if head[:6] in (b"GIF87a", b"GIF89a"):
+        return "GIF", _gif
+    if head[:4] == b"RIFF" and head[8:12] == b"WEBP":
+        return "WEBP", _webp
+    if head[:2] == b"BM":
+        return "BMP", _bmp
+    if head[:4] in (b"II*\x00", b"MM\x00*", b"II+\x00", b"MM\x00+"):
+        return "TIFF", _tiff
+    return None
+
+
+def pillow_extensions():
+    if Image is None:
+        return frozenset()
+    return frozenset(Image.registered_extensions())
+
+
+def probe(path, fallback_extensions=frozenset()):
+    """
+    (format, width, height, mode) of an image, None for anything else;
+    mode is None when the header does not tell.
+
+    Known formats are read from their header only. Other files go to
+    Pillow, but only when their extension is in fallback_extensions,
+    so non-images are never fully parsed.
+    """
+    try:
+        with open(path, "rb") as f:
+            head = f.read(HEADER_BYTES)
+            known = sniff(head)
+            if known is not None:
+                fmt, parse = known
+                info = parse(head, f)
+                if info is not None:
+                    return (fmt,) + info
+    except (OSError, struct.error):
+        return None
+
+    if Image is None or os.path.splitext(path)[1].lower() not in fallback_extensions:
+        return None
+    try:
+        with Image.open(path) as img:
+            return img.format, img.size[0], img.size[1], img.mode
+    except Exception:
+        return None
+
+
+def probe_all(paths, workers=None):
+    """Yield (path, probe(path)) in order, probing on a thread pool."""
+    extensions = pillow_extensions()
+    with ThreadPoolExecutor(workers or default_workers()) as pool:
+        yield from zip(paths, pool.map(lambda p: probe(p, extensions), paths))
@@ -1,7 +1,163 @@
 import os
+import re
+import json
+import time
 import argparse
+from itertools import islice
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
 
-def delete_files(folder_path, include_elements=None, exclude_elements=None):
+from trash import TRASH_DIR, TrashRun, list_runs, undo, purge
+
+BATCH_SIZE = 1000  # Paths unlinked per pool task
+PROGRESS_SECONDS = 1.0  # Minimum time between progress lines
+
+
+def default_workers():
+    return min(32, (os.cpu_count() or 1) * 4)
+
+
+def compile_terms(elements):
+    """One regex matching any of the substrings, None when there are none."""
+    if not elements:
+        return None
+    # Longest first so the alternation never stops at a shorter prefix
+    terms = sorted({e for e in elements if e}, key=len, reverse=True)
+    return re.compile("|".join(map(re.escape, terms))) if terms else None
+
+
+def make_filter(include_elements=None, exclude_elements=None):
+    """Filename predicate: contains an include element and no exclude element."""
+    include = compile_terms(include_elements)
+    exclude = compile_terms(exclude_elements)
+
+    def wanted(filename):
+        if include is not None and not include.search(filename):
+            return False
+        return exclude is None or not exclude.search(filename)
+
+    return wanted
+
+
+def list_matches(folder, wanted):
+    """(matching file paths, subfolders) of one folder."""
+    files = []
+    dirs = []
+    try:
+        with os.scandir(folder) as it:
+            for entry in it:
+                if entry.name == TRASH_DIR:
+                    continue
+                try:
+                    if entry.is_dir(follow_symlinks=False):
+                        dirs.append(entry.path)
+                    elif entry.is_file() and wanted(entry.name):
+                        files.append(entry.path)
+                except OSError:
+                    continue
+    except OSError as e:
+        print(f"Cannot read {folder}: {e}")
+    return files, dirs
+
+
+def find_files(folder_path, wanted, recursive=False, workers=None):
+    """
+    Yield the paths of matching files, listing the folders of each level
+    concurrently when recursive. Symlinked folders are not followed.
+    """
+    level = [folder_path]
+    with ThreadPoolExecutor(workers or default_workers()) as pool:
+        while level:
+            next_level = []
+            for files, dirs in pool.map(lambda d: list_matches(d, wanted), level):
+                yield from files
+                next_level += dirs
+            level = next_level if recursive else []
+
+
+def write_plan(paths, plan_path, folder_path):
+    """Write one JSON-quoted path per line; returns the number of paths."""
+    count = 0
+    with open(plan_path, "w", encoding="utf8") as f:
+        f.write(f"# Files to delete under {folder_path}\n")
+        for count, path in enumerate(paths, 1):
+            f.write(json.dumps(path) + "\n")
+    return count
+
+
+def read_plan(plan_path):
+    with open(plan_path, "r", encoding="utf8") as f:
+        for line in f:
+            line = line.strip()
+            if line and not line.startswith("#"):
+                yield json.loads(line)
+
+
+def unlink_batch(paths, offset=0):
+    deleted = 0
+    failed = []
+    for path in paths:
+        try:
+            os.unlink(path)
+            deleted += 1
+        except OSError as e:
+            failed.append((path, e))
+    return deleted, failed
+
+
+def execute_plan(plan_path, total=None, workers=None, action=unlink_batch, verb="Deleted"):
+    """
+    Delete (or trash) the files listed in a plan on a thread pool.
+
+    Paths are handed out in batches and only a few batches are in flight,
+    so huge plans are never fully loaded. action(batch, offset) handles one
+    batch, offset being the position of its first path in the plan.
+    Progress is printed at most once per PROGRESS_SECONDS. Returns
+    (deleted, failed).
+    """
+    workers = workers or default_workers()
+    paths = read_plan(plan_path)
+    offset = deleted = failed = 0
+    last_report = time.perf_counter()
+
+    with ThreadPoolExecutor(workers) as pool:
+        running = set()
+        while True:
+            while len(running) < workers * 2:
+                batch = list(islice(paths, BATCH_SIZE))
+                if not batch:
+                    break
+                running.add(pool.submit(action, batch, offset))
+                offset += len(batch)
+            if not running:
+                break
+
+            done, running = wait(running, return_when=FIRST_COMPLETED)
+            for future in done:
+                count, failures = future.result()
+                deleted += count
+                failed += len(failures)
+                for path, e in failures:
+                    print(f"Failed: {path}: {e}")
+
+            now = time.perf_counter()
+            if now - last_report >= PROGRESS_SECONDS:
+                of = f"/{total}" if total is not None else ""
+                print(f"{verb} {deleted}{of} files...")
+                last_report = now
+
+    return deleted, failed
+
+
+def delete_files(
+    folder_path,
+    include_elements=None,
+    exclude_elements=None,
+    recursive=False,
+    plan_path=None,
+    dry_run=False,
+    workers=None,
+    trash=False,
+):
     """
     Delete files in a folder based on filename elements.
 
@@ -9,39 +165,121 @@ def delete_files(folder_path, include_elements=None, exclude_elements=None):
     - folder_path (str): Path to the folder.
     - include_elements (list of str): Only delete files that contain any of these elements.
     - exclude_elements (list of str): Only delete files that DO NOT contain any of these elements.
+    - recursive (bool): Also delete matching files in subfolders.
+    - plan_path (str): Where to write the list of files to delete first.
+    - dry_run (bool): Only write the plan.
+    - workers (int): Threads used for scanning and deleting.
+    - trash (bool): Move the files into the trash folder instead, so the run can be undone.
     """
-    for filename in os.listdir(folder_path):
-        file_path = os.path.join(folder_path, filename)
-        if not os.path.isfile(file_path):
-            continue  # Skip subfolders
+    wanted = make_filter(include_elements, exclude_elements)
+    if plan_path is None:
+        plan_path = os.path.join(folder_path, f".delete-plan-{int(time.time())}.txt")
 
-        # Check inclusion
-        if include_elements and not any(elem in filename for elem in include_elements):
-            continue  # Skip if filename doesn't have required elements
+    matches = find_files(folder_path, wanted, recursive, workers)
+    # The plan itself must not end up in the plan
+    plan_abs = os.path.abspath(plan_path)
+    matches = (p for p in matches if os.path.abspath(p) != plan_abs)
+    total = write_plan(matches, plan_path, folder_path)
+    print(f"Plan: {total} files to delete, written to {plan_path}")
 
-        # Check exclusion
-        if exclude_elements and any(elem in filename for elem in exclude_elements):
-            continue  # Skip if filename has excluded elements
+    if dry_run:
+        return
+    if not total:
+        os.remove(plan_path)
+        return
 
-        # Delete the file
+    start = time.perf_counter()
+    if trash:
+        run = TrashRun(folder_path)
         try:
-            os.remove(file_path)
-            print(f"Deleted: {filename}")
-        except Exception as e:
-            print(f"Failed to delete {filename}: {e}")
+            deleted, failed = execute_plan(plan_path, total, workers, run.move_batch, "Trashed")
+        finally:
+            run.close()
+        print(f"Trashed {deleted} files in {time.perf_counter() - start:.1f}s, {failed} failed")
+        print(f"Undo with: --undo {run.name} {folder_path}")
+    else:
+        deleted, failed = execute_plan(plan_path, total, workers)
+        print(f"Deleted {deleted} files in {time.perf_counter() - start:.1f}s, {failed} failed")
+
+    if not failed:
+        os.remove(plan_path)
+
 
 def main():
     parser = argparse.ArgumentParser(description="Delete files based on filename elements.")
-    parser.add_argument("folder", help="Path to the folder containing files")
+    parser.add_argument("folder", nargs="?", help="Path to the folder containing files")
     parser.add_argument("--include", "-i", help="Comma-separated words to include in filenames", default="")
     parser.add_argument("--exclude", "-e", help="Comma-separated words to exclude from filenames", default="")
+    parser.add_argument("--recursive", "-r", action="store_true", help="Also delete in subfolders")
+    parser.add_argument("--plan", help="Plan file to write (default: .delete-plan-<time>.txt in the folder)")
+    parser.add_argument("--dry-run", action="store_true", help="Only write the plan, delete nothing")
+    parser.add_argument("--execute", metavar="PLAN", help="Delete the files listed in an existing plan")
+    parser.add_argument("--workers", type=int, help="Threads used for scanning and deleting")
+    parser.add_argument("--trash", action="store_true", help="Move files to the folder's trash instead of deleting them")
+    parser.add_argument("--list-trash", action="store_true", help="List the trash runs of the folder")
+    parser.add_argument("--undo", metavar="RUN", help="Move the files of a trash run back")
+    parser.add_argument("--purge", nargs="*", metavar="RUN", help="Permanently delete trash runs (all if none given)")
 
     args = parser.parse_args()
 
+    if args.execute:
+        if args.list_trash or args.undo or args.purge is not None:
+            parser.error("--execute cannot be combined with --list-trash, --undo or --purge")
+        if not args.trash:
+            deleted, failed = execute_plan(args.execute, workers=args.workers)
+            print(f"Deleted {deleted} files, {failed} failed")
+            return
+        if not args.folder:
+            parser.error("folder is required for --execute with --trash, to hold the trash")
+
+        run = TrashRun(args.folder)
+        try:
+            deleted, failed = execute_plan(args.execute, workers=args.workers, action=run.move_batch, verb="Trashed")
+        finally:
+            run.close()
+        print(f"Trashed {deleted} files, {failed} failed")
+        print(f"Undo with: --undo {run.name} {args.folder}")
+        return
+
+    if not args.folder:
+        parser.error("folder is required unless --execute is given without --trash")
+
+    if args.list_trash:
+        for run in list_runs(args.folder):
+            print(run)
+        return
+
+    if args.undo:
+        try:
+            restored, skipped = undo(args.folder, args.undo)
+        except ValueError as e:
+            parser.error(str(e))
+        print(f"Restored {restored} files, {skipped} skipped")
+        return
+
+    if args.purge is not None:
+        # Runs in the background while any matching below goes on
+        try:
+            purge(args.folder, args.purge or None)
+        except ValueError as e:
+            parser.error(str(e))
+        print("Purging trash in the background")
+        if not (args.include or args.exclude):
+            return
+
     include_elements = [x.strip() for x in args.include.split(",")] if args.include else None
     exclude_elements = [x.strip() for x in args.exclude.split(",")] if args.exclude else None
 
-    delete_files(args.folder, include_elements, exclude_elements)
+    delete_files(
+        args.folder,
+        include_elements,
+        exclude_elements,
+        recursive=args.recursive,
+        plan_path=args.plan,
+        dry_run=args.dry_run,
+        workers=args.workers,
+        trash=args.trash,
+    )
 
 if __name__ == "__main__":
     main()
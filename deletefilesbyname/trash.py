@@ -0,0 +1,138 @@
+import os
+import json
+import time
+import shutil
+import threading
+
+TRASH_DIR = ".deletefilesbyname-trash"
+JOURNAL = "journal"
+FILES = "files"
+PURGING = ".purging"
+
+
+def trash_root(folder_path):
+    """
+    The staging folder of a tree, at its top so that moves into it are
+    plain renames on the same filesystem.
+    """
+    return os.path.join(folder_path, TRASH_DIR)
+
+
+class TrashRun:
+    """
+    One trash run: matched files are renamed to files/<n> and each line of
+    the journal is "<n>\t<JSON original path>", written before the rename
+    so an interrupted run can still be undone.
+    """
+
+    def __init__(self, folder_path, name=None):
+        self.name = name or time.strftime("%Y%m%d-%H%M%S") + f"-{os.getpid()}"
+        self.path = os.path.join(trash_root(folder_path), self.name)
+        self.files = os.path.join(self.path, FILES)
+        os.makedirs(self.files, exist_ok=True)
+        self.journal = open(os.path.join(self.path, JOURNAL), "a", encoding="utf8")
+        self.lock = threading.Lock()
+
+    def close(self):
+        self.journal.close()
+
+    def move_batch(self, paths, offset):
+        """Rename paths into the run; returns (moved, [(path, error)])."""
+        lines = "".join(
+            f"{offset + i}\t{json.dumps(path)}\n" for i, path in enumerate(paths)
+        )
+        with self.lock:
+            self.journal.write(lines)
+            self.journal.flush()
+
+        moved = 0
+        failed = []
+        for i, path in enumerate(paths):
+            try:
+                os.rename(path, os.path.join(self.files, str(offset + i)))
+                moved += 1
+            except OSError as e:
+                # EXDEV: below a mount point, not on the staging filesystem
+                failed.append((path, e))
+        return moved, failed
+
+
+def list_runs(folder_path):
+    root = trash_root(folder_path)
+    try:
+        return sorted(
+            name for name in os.listdir(root)
+            if os.path.isfile(os.path.join(root, name, JOURNAL))
+        )
+    except FileNotFoundError:
+        return []
+
+
+def check_runs(folder_path, runs):
+    """Raise ValueError unless every name in runs is a trash run of the folder."""
+    unknown = sorted(set(runs) - set(list_runs(folder_path)))
+    if unknown:
+        raise ValueError(f"No such trash run: {', '.join(unknown)}")
+
+
+def read_journal(run_path):
+    with open(os.path.join(run_path, JOURNAL), "r", encoding="utf8") as f:
+        for line in f:
+            index, _, path = line.rstrip("\n").partition("\t")
+            if path:
+                yield index, json.loads(path)
+
+
+def undo(folder_path, run):
+    """Move the files of a run back; returns (restored, skipped)."""
+    check_runs(folder_path, [run])
+    run_path = os.path.join(trash_root(folder_path), run)
+    files = os.path.join(run_path, FILES)
+    restored = skipped = 0
+
+    for index, path in read_journal(run_path):
+        staged = os.path.join(files, index)
+        if not os.path.lexists(staged):
+            continue  # Journaled but never moved, or already restored
+        if os.path.lexists(path):
+            print(f"Not restored, {path} exists again")
+            skipped += 1
+            continue
+        try:
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            os.rename(staged, path)
+            restored += 1
+        except OSError as e:
+            print(f"Failed to restore {path}: {e}")
+            skipped += 1
+
+    if not skipped:
+        shutil.rmtree(run_path, ignore_errors=True)
+    return restored, skipped
+
+
+def purge(folder_path, runs=None):
+    """
+    Permanently delete trash runs (all of them by default) in the background.
+
+    The runs are first renamed out of the way, which is instant, so they
+    disappear from list_runs() right away; the slow rmtree then runs on a
+    thread. Returns the thread, to join() before exiting. Unknown run
+    names raise ValueError before anything is moved.
+    """
+    if runs is not None:
+        check_runs(folder_path, runs)
+    root = trash_root(folder_path)
+    purging = os.path.join(root, PURGING)
+    os.makedirs(purging, exist_ok=True)
+
+    for run in list_runs(folder_path) if runs is None else runs:
+        try:
+            os.rename(os.path.join(root, run), os.path.join(purging, run))
+        except OSError as e:
+            print(f"Cannot purge {run}: {e}")
+
+    # Also picks up whatever an interrupted purge left behind
+    thread = threading.Thread(target=shutil.rmtree, args=(purging, True))
+    thread.start()
+    return thread
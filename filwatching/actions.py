@@ -0,0 +1,155 @@
+import os
+import json
+import shlex
+import fnmatch
+import logging
+import importlib
+import threading
+import subprocess
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+
+from backends import CREATED, MODIFIED, MOVED
+
+DEFAULT_EVENTS = (CREATED, MODIFIED, MOVED)
+
+
+class Rule:
+    """
+    One glob -> action mapping from the actions file.
+
+    Example entry:
+
+        {
+            "name": "codepng",
+            "glob": ["*.py", "*.js"],
+            "command": ["python", "../codetopng/cli.py", "{path}"],
+            "events": ["created", "modified"],
+            "concurrency": 2,
+            "timeout": 60
+        }
+
+    Use "callable": "module:function" instead of "command" to call
+    function(path, event) in-process. Command arguments may use the
+    {path}, {dir}, {name} and {event} placeholders.
+    """
+
+    def __init__(self, config):
+        self.name = config["name"]
+        globs = config["glob"]
+        self.globs = [globs] if isinstance(globs, str) else list(globs)
+        self.events = set(config.get("events", DEFAULT_EVENTS))
+        self.concurrency = max(1, int(config.get("concurrency", 1)))
+        self.timeout = config.get("timeout")
+
+        self.command = config.get("command")
+        if isinstance(self.command, str):
+            self.command = shlex.split(self.command)
+
+        self.func = None
+        if "callable" in config:
+            module, _, attr = config["callable"].partition(":")
+            self.func = getattr(importlib.import_module(module), attr)
+
+        if (self.command is None) == (self.func is None):
+            raise ValueError(f"Rule {self.name!r} needs exactly one of 'command' or 'callable'")
+
+        # Scheduling state, guarded by ActionRunner.lock
+        self.running = 0
+        self.queue = deque()
+
+    def matches(self, path):
+        name = os.path.basename(path)
+        return any(fnmatch.fnmatch(name, g) for g in self.globs)
+
+    def run(self, path, event):
+        if self.func is not None:
+            self.func(path, event)
+            return
+
+        fields = {
+            "path": path,
+            "dir": os.path.dirname(path),
+            "name": os.path.basename(path),
+            "event": event,
+        }
+        args = [arg.format(**fields) for arg in self.command]
+        result = subprocess.run(
+            args, capture_output=True, text=True, timeout=self.timeout
+        )
+        if result.returncode != 0:
+            raise RuntimeError(
+                f"exit code {result.returncode}: {result.stderr.strip()[-500:]}"
+            )
+
+
+class ActionRunner:
+    """
+    Run rule actions for file events on a bounded thread pool.
+
+    Each rule runs at most ``concurrency`` actions at a time; the rest wait
+    in a per-rule queue without holding a pool thread. A target that is
+    still queued when a newer event for it arrives is not run twice: the
+    queued run is replaced by the newer one. A target that is already
+    running is queued again so it sees the latest state.
+    """
+
+    def __init__(self, rules, max_workers=4):
+        self.rules = rules
+        self.pool = ThreadPoolExecutor(max_workers)
+        self.lock = threading.Lock()
+        self.latest = {}  # (rule name, path) -> event of the queued run
+
+    def handle(self, events):
+        for event in events:
+            path = event.dest if event.kind == MOVED else event.path
+            for rule in self.rules:
+                if event.kind in rule.events and rule.matches(path):
+                    self.submit(rule, path, event.kind)
+
+    def submit(self, rule, path, event):
+        key = (rule.name, path)
+        with self.lock:
+            if key in self.latest:
+                logging.debug(f"[{rule.name}] superseded queued run for {path}")
+            else:
+                rule.queue.append(path)
+            self.latest[key] = event
+            self._pump(rule)
+
+    def _pump(self, rule):
+        while rule.running < rule.concurrency and rule.queue:
+            path = rule.queue.popleft()
+            event = self.latest.pop((rule.name, path))
+            rule.running += 1
+            self.pool.submit(self._run, rule, path, event)
+
+    def _run(self, rule, path, event):
+        try:
+            rule.run(path, event)
+            logging.info(f"[{rule.name}] done: {path}")
+        except Exception as e:
+            logging.error(f"[{rule.name}] failed on {path}: {e}")
+        finally:
+            with self.lock:
+                rule.running -= 1
+                self._pump(rule)
+
+    def shutdown(self):
+        self.pool.shutdown(wait=False, cancel_futures=True)
+
+
+def load_actions(path):
+    """Build an ActionRunner from a JSON actions file, None if there is none."""
+    if not os.path.exists(path):
+        return None
+
+    with open(path, "r", encoding="utf-8") as f:
+        config = json.load(f)
+
+    rules = [Rule(r) for r in config.get("rules", [])]
+    if not rules:
+        return None
+
+    logging.info(f"Loaded {len(rules)} action rule(s) from {path}")
+    return ActionRunner(rules, config.get("max_workers", 4))
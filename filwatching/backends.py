@@ -0,0 +1,278 @@
+import os
+import sys
+import time
+import errno
+import select
+import struct
+import ctypes
+import ctypes.util
+import logging
+
+CREATED = "created"
+DELETED = "deleted"
+MODIFIED = "modified"
+MOVED = "moved"  # Only produced by the event pipeline
+
+# Backends report events as (event, path, inode); inode is None when unknown
+
+# === inotify constants (linux/inotify.h) ===
+IN_MODIFY = 0x00000002
+IN_ATTRIB = 0x00000004
+IN_MOVED_FROM = 0x00000040
+IN_MOVED_TO = 0x00000080
+IN_CREATE = 0x00000100
+IN_DELETE = 0x00000200
+IN_DELETE_SELF = 0x00000400
+IN_Q_OVERFLOW = 0x00004000
+IN_IGNORED = 0x00008000
+IN_ONLYDIR = 0x01000000
+IN_DONT_FOLLOW = 0x02000000
+IN_ISDIR = 0x40000000
+IN_NONBLOCK = os.O_NONBLOCK
+IN_CLOEXEC = getattr(os, "O_CLOEXEC", 0o2000000)
+
+WATCH_MASK = (
+    IN_MODIFY | IN_ATTRIB | IN_MOVED_FROM | IN_MOVED_TO | IN_CREATE
+    | IN_DELETE | IN_DELETE_SELF | IN_ONLYDIR | IN_DONT_FOLLOW
+)
+
+EVENT_HEADER = struct.Struct("iIII")  # wd, mask, cookie, len
+READ_SIZE = 64 * 1024
+
+
+class PollingBackend:
+    """
+    Fallback backend: refresh a SnapshotCache every interval.
+
+    The cache only re-lists directories whose mtime changed and reports
+    the differences itself, so nothing is diffed here.
+    """
+
+    name = "poll"
+
+    def __init__(self, cache, interval):
+        self.cache = cache
+        self.interval = interval
+        self.cache.refresh()  # Baseline, the existing files are not "created"
+
+    def read_events(self, timeout=None):
+        time.sleep(self.interval)
+        return self.cache.refresh()
+
+    def watched_files(self):
+        """Watched files currently known to exist."""
+        return list(self.cache.files)
+
+    def close(self):
+        pass
+
+
+class InotifyBackend:
+    """
+    Linux backend: one inotify watch per directory, kept in sync as
+    directories are created, moved and removed.
+
+    Watched file names are remembered per directory so that a folder moved
+    out of (or into) the tree reports its files as deleted (or created),
+    just like the poller would. Raises OSError if inotify is unavailable
+    or the watch limit (fs.inotify.max_user_watches) is reached.
+    """
+
+    name = "inotify"
+
+    def __init__(self, directory, should_watch, excluded_dirs):
+        if not sys.platform.startswith("linux"):
+            raise OSError(errno.ENOSYS, "inotify is only available on Linux")
+
+        self.directory = directory
+        self.should_watch = should_watch
+        self.excluded_dirs = excluded_dirs
+
+        self.libc = ctypes.CDLL(ctypes.util.find_library("c") or "libc.so.6", use_errno=True)
+        self.libc.inotify_add_watch.argtypes = [ctypes.c_int, ctypes.c_char_p, ctypes.c_uint32]
+        self.libc.inotify_rm_watch.argtypes = [ctypes.c_int, ctypes.c_int]
+
+        self.fd = self.libc.inotify_init1(IN_NONBLOCK | IN_CLOEXEC)
+        if self.fd < 0:
+            self._raise()
+
+        self.paths = {}  # wd -> directory path
+        self.wds = {}  # directory path -> wd
+        self.files = {}  # wd -> {name: inode} of watched files in that directory
+
+        try:
+            self.add_tree(self.directory)
+        except OSError:
+            self.close()
+            raise
+
+    def _raise(self):
+        err = ctypes.get_errno()
+        raise OSError(err, os.strerror(err))
+
+    # === Watch management ===
+    def add_tree(self, top, events=None):
+        """Watch top and every directory below it; optionally report its files as created."""
+        stack = [top]
+        while stack:
+            root = stack.pop()
+
+            # Watch before listing so nothing created in between is missed
+            wd = self.libc.inotify_add_watch(self.fd, os.fsencode(root), WATCH_MASK)
+            if wd < 0:
+                if ctypes.get_errno() in (errno.ENOENT, errno.ENOTDIR, errno.EACCES):
+                    continue  # Vanished or unreadable while walking
+                self._raise()
+
+            names = {}
+            try:
+                with os.scandir(root) as it:
+                    for entry in it:
+                        try:
+                            if entry.is_dir():
+                                # Same as os.walk: symlinked folders are not followed
+                                if entry.name not in self.excluded_dirs and not entry.is_symlink():
+                                    stack.append(entry.path)
+                                continue
+                        except OSError:
+                            pass
+                        if self.should_watch(entry.path):
+                            names[entry.name] = entry.inode()
+            except OSError:
+                pass
+
+            self.paths[wd] = root
+            self.wds[root] = wd
+            self.files[wd] = names
+
+            if events is not None:
+                events.extend(
+                    (CREATED, os.path.join(root, name), ino)
+                    for name, ino in names.items()
+                )
+
+    def remove_tree(self, top, events):
+        """Drop watches on top and below it, reporting their files as deleted."""
+        prefix = top + os.sep
+        for path in [p for p in self.wds if p == top or p.startswith(prefix)]:
+            wd = self.wds.pop(path)
+            del self.paths[wd]
+            events.extend(
+                (DELETED, os.path.join(path, name), ino)
+                for name, ino in self.files.pop(wd, {}).items()
+            )
+            self.libc.inotify_rm_watch(self.fd, wd)
+
+    def resync(self, events):
+        """Rebuild all watches after the kernel queue overflowed."""
+        logging.warning("inotify queue overflowed, rescanning the tree")
+        known = {
+            os.path.join(self.paths[wd], name): ino
+            for wd, names in self.files.items() for name, ino in names.items()
+        }
+        for wd in list(self.paths):
+            self.libc.inotify_rm_watch(self.fd, wd)
+        self.paths.clear()
+        self.wds.clear()
+        self.files.clear()
+
+        created = []
+        self.add_tree(self.directory, created)
+        current = {path: ino for _, path, ino in created}
+        events.extend((CREATED, p, current[p]) for p in current.keys() - known.keys())
+        events.extend((DELETED, p, known[p]) for p in known.keys() - current.keys())
+        # Anything else may have changed while events were being dropped
+        events.extend((MODIFIED, p, current[p]) for p in current.keys() & known.keys())
+
+    def watched_files(self):
+        """Watched files currently known to exist."""
+        return [
+            os.path.join(self.paths[wd], name)
+            for wd, names in self.files.items() for name in names
+        ]
+
+    # === Event reading ===
+    def read_events(self, timeout=None):
+        readable, _, _ = select.select([self.fd], [], [], timeout)
+        if not readable:
+            return []
+
+        data = b""
+        while True:
+            try:
+                chunk = os.read(self.fd, READ_SIZE)
+            except BlockingIOError:
+                break
+            if not chunk:
+                break
+            data += chunk
+
+        events = []
+        offset = 0
+        while offset < len(data):
+            wd, mask, _cookie, length = EVENT_HEADER.unpack_from(data, offset)
+            offset += EVENT_HEADER.size
+            name = os.fsdecode(data[offset:offset + length].rstrip(b"\0"))
+            offset += length
+
+            if mask & IN_Q_OVERFLOW:
+                self.resync(events)
+                continue
+
+            self.handle(wd, mask, name, events)
+
+        return events
+
+    def handle(self, wd, mask, name, events):
+        folder = self.paths.get(wd)
+        if folder is None:
+            return  # Event for a watch that was already removed
+
+        if mask & IN_DELETE_SELF:
+            self.remove_tree(folder, events)
+            return
+
+        if mask & IN_IGNORED:
+            # The kernel dropped the watch on its own (e.g. unmount)
+            del self.paths[wd]
+            self.wds.pop(folder, None)
+            self.files.pop(wd, None)
+            return
+
+        path = os.path.join(folder, name)
+
+        if mask & IN_ISDIR:
+            if name in self.excluded_dirs:
+                return
+            if mask & (IN_CREATE | IN_MOVED_TO):
+                self.add_tree(path, events)
+            elif mask & IN_MOVED_FROM:
+                self.remove_tree(path, events)
+            return
+
+        if not self.should_watch(path):
+            return
+
+        names = self.files[wd]
+        if mask & (IN_CREATE | IN_MOVED_TO):
+            try:
+                ino = os.stat(path, follow_symlinks=False).st_ino
+            except OSError:
+                ino = None
+            if name not in names:
+                names[name] = ino
+                events.append((CREATED, path, ino))
+            elif mask & IN_MOVED_TO:
+                names[name] = ino
+                events.append((MODIFIED, path, ino))  # Replaced by a rename
+        elif mask & (IN_DELETE | IN_MOVED_FROM):
+            if name in names:
+                events.append((DELETED, path, names.pop(name)))
+        elif mask & (IN_MODIFY | IN_ATTRIB):
+            if name in names:
+                events.append((MODIFIED, path, names[name]))
+
+    def close(self):
+        if self.fd >= 0:
+            os.close(self.fd)
+            self.fd = -1
@@ -0,0 +1,142 @@
+import os
+import sqlite3
+import hashlib
+import logging
+
+from backends import CREATED, DELETED, MODIFIED, MOVED
+from pipeline import Event
+
+try:
+    import xxhash
+except ImportError:
+    xxhash = None
+
+HASH_DIR = os.path.join(os.path.expanduser("~"), ".cache", "filetools", "filwatching")
+CHUNK_SIZE = 1 << 20
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS hashes (
+    path TEXT PRIMARY KEY,
+    size INTEGER NOT NULL,
+    mtime_ns INTEGER NOT NULL,
+    digest BLOB NOT NULL
+);
+"""
+
+
+def hash_db_path(directory, hash_dir=HASH_DIR):
+    key = hashlib.sha1(os.path.abspath(directory).encode("utf-8", "surrogateescape"))
+    return os.path.join(hash_dir, key.hexdigest()[:16] + ".sqlite")
+
+
+def file_digest(path):
+    """128-bit content hash: xxh3 when xxhash is installed, blake2b otherwise."""
+    h = xxhash.xxh3_128() if xxhash is not None else hashlib.blake2b(digest_size=16)
+    with open(path, "rb") as f:
+        while chunk := f.read(CHUNK_SIZE):
+            h.update(chunk)
+    return h.digest()
+
+
+class HashStore:
+    """
+    Persistent per-file content hashes, keyed by path.
+
+    A file is only re-read when its size or mtime (in ns) differs from the
+    stored record, so unchanged files cost one stat. Used to drop
+    modifications that did not change the content (touch, identical
+    rewrites) and, because the records survive restarts, to report only
+    what really changed while the watcher was not running.
+    """
+
+    def __init__(self, db_path):
+        os.makedirs(os.path.dirname(db_path), exist_ok=True)
+        # Opened on the main thread, then only used by the dispatcher thread
+        self.db = sqlite3.connect(db_path, check_same_thread=False)
+        self.db.executescript(SCHEMA)
+
+    def close(self):
+        self.db.commit()
+        self.db.close()
+
+    def update(self, path):
+        """Return (old digest, new digest); new is None if the file is gone."""
+        row = self.db.execute(
+            "SELECT size, mtime_ns, digest FROM hashes WHERE path = ?", (path,)
+        ).fetchone()
+        old = None if row is None else row[2]
+
+        try:
+            st = os.stat(path)
+            if row is not None and (st.st_size, st.st_mtime_ns) == (row[0], row[1]):
+                return old, old
+            digest = file_digest(path)
+        except OSError:
+            self.forget(path)
+            return old, None
+
+        self.db.execute(
+            "INSERT OR REPLACE INTO hashes VALUES (?, ?, ?, ?)",
+            (path, st.st_size, st.st_mtime_ns, digest),
+        )
+        return old, digest
+
+    def forget(self, path):
+        self.db.execute("DELETE FROM hashes WHERE path = ?", (path,))
+
+    def move(self, src, dest):
+        self.forget(dest)
+        self.db.execute("UPDATE hashes SET path = ? WHERE path = ?", (dest, src))
+
+    def filter(self, events):
+        """Drop MODIFIED events whose content hash did not change."""
+        kept = []
+        for event in events:
+            if event.kind == MODIFIED:
+                old, new = self.update(event.path)
+                if old is not None and old == new:
+                    continue
+            elif event.kind == CREATED:
+                self.update(event.path)
+            elif event.kind == DELETED:
+                self.forget(event.path)
+            elif event.kind == MOVED:
+                self.move(event.path, event.dest)
+                self.update(event.dest)
+            kept.append(event)
+
+        self.db.commit()
+        return kept
+
+    def reconcile(self, paths):
+        """
+        Compare the files present now with the stored hashes, e.g. at startup.
+
+        Returns the Events that happened while nobody was watching.
+        """
+        events = []
+        current = set()
+        # The very first run only records a baseline
+        first_run = self.db.execute("SELECT 1 FROM hashes LIMIT 1").fetchone() is None
+
+        for path in paths:
+            current.add(path)
+            old, new = self.update(path)
+            if new is None or first_run:
+                continue
+            if old is None:
+                events.append(Event(CREATED, path, None))
+            elif old != new:
+                events.append(Event(MODIFIED, path, None))
+
+        gone = [
+            path for (path,) in self.db.execute("SELECT path FROM hashes")
+            if path not in current
+        ]
+        for path in gone:
+            self.forget(path)
+            events.append(Event(DELETED, path, None))
+
+        self.db.commit()
+        logging.info(f"Hash store: {len(current)} file(s), {len(events)} change(s) since last run")
+        return events
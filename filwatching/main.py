@@ -1,10 +1,23 @@
 import os
-import time
 import logging
 
+from backends import (
+    CREATED, DELETED, MODIFIED, MOVED, InotifyBackend, PollingBackend
+)
+from pipeline import EventPipeline
+from hashstore import HashStore, hash_db_path
+from actions import load_actions
+from snapshot import SnapshotCache
+
 # === Configuration ===
 WATCHED_DIR = "your_directory_here"
 POLL_INTERVAL = 1  # seconds
+STAT_WORKERS = min(8, os.cpu_count() or 1)  # Threads stat'ing files when polling
+BACKEND = "auto"  # "auto" (inotify, falling back to polling), "inotify" or "poll"
+COALESCE_WINDOW = 0.5  # Seconds a path must be quiet before its events are delivered
+MAX_BATCH = 1000  # Events handed to the handlers at once
+HASH_MODE = False  # Confirm changes by content hash, remembered across restarts
+ACTIONS_FILE = "actions.json"  # Glob -> command rules run on change (see actions.Rule)
 
 ALLOWED_EXTENSIONS = {".txt", ".py", ".md"}  # Only watch these file types
 EXCLUDED_DIRS = {"__pycache__", "venv", ".git"}  # Skip these subdirectories
@@ -26,52 +39,83 @@ def on_deleted(path):
 def on_modified(path):
     logging.info(f"Modified: {path}")
 
+def on_moved(src, dest):
+    logging.info(f"Moved:    {src} -> {dest}")
+
+HANDLERS = {
+    CREATED: on_created,
+    DELETED: on_deleted,
+    MODIFIED: on_modified,
+}
+
+def on_batch(events):
+    for event in events:
+        if event.kind == MOVED:
+            on_moved(event.path, event.dest)
+        else:
+            HANDLERS[event.kind](event.path)
+
 # === Utility Functions ===
 def should_watch(path):
     ext = os.path.splitext(path)[1]
     return ext in ALLOWED_EXTENSIONS
 
-def get_snapshot(directory):
-    snapshot = {}
-    for root, dirs, files in os.walk(directory):
-        # Exclude certain subdirectories
-        dirs[:] = [d for d in dirs if d not in EXCLUDED_DIRS]
-
-        for filename in files:
-            path = os.path.join(root, filename)
-            if should_watch(path):
-                try:
-                    mtime = os.path.getmtime(path)
-                    snapshot[path] = mtime
-                except FileNotFoundError:
-                    pass  # File may have been removed during the scan
-    return snapshot
+def get_snapshot(directory, cache=None):
+    """
+    Return {path: mtime} for the watched files under directory.
+
+    Pass the same SnapshotCache on every call to only re-list the
+    directories that changed since the previous one.
+    """
+    if cache is None:
+        cache = SnapshotCache(directory, should_watch, EXCLUDED_DIRS)
+    cache.refresh()
+    return {path: stat[0] for path, stat in cache.files.items()}
+
+def create_backend(directory):
+    if BACKEND in ("auto", "inotify"):
+        try:
+            return InotifyBackend(directory, should_watch, EXCLUDED_DIRS)
+        except OSError as e:
+            if BACKEND == "inotify":
+                raise
+            logging.warning(f"inotify unavailable ({e}), falling back to polling")
+    cache = SnapshotCache(directory, should_watch, EXCLUDED_DIRS, STAT_WORKERS)
+    return PollingBackend(cache, POLL_INTERVAL)
 
 # === Main Loop ===
 def main():
-    logging.info(f"Watching directory: {WATCHED_DIR}")
-    previous_snapshot = get_snapshot(WATCHED_DIR)
-
-    while True:
-        time.sleep(POLL_INTERVAL)
-        current_snapshot = get_snapshot(WATCHED_DIR)
-
-        prev_paths = set(previous_snapshot)
-        curr_paths = set(current_snapshot)
-
-        added = curr_paths - prev_paths
-        removed = prev_paths - curr_paths
-        common = curr_paths & prev_paths
-
-        for path in added:
-            on_created(path)
-        for path in removed:
-            on_deleted(path)
-        for path in common:
-            if previous_snapshot[path] != current_snapshot[path]:
-                on_modified(path)
-
-        previous_snapshot = current_snapshot
+    backend = create_backend(WATCHED_DIR)
+    runner = load_actions(ACTIONS_FILE)
+    hashes = HashStore(hash_db_path(WATCHED_DIR)) if HASH_MODE else None
+
+    def dispatch(events):
+        on_batch(events)
+        if runner is not None:
+            runner.handle(events)
+
+    def handler(events):
+        if hashes is not None:
+            events = hashes.filter(events)
+        dispatch(events)
+
+    if hashes is not None:
+        # Already hashed, so bypass the filter
+        dispatch(hashes.reconcile(backend.watched_files()))
+
+    pipeline = EventPipeline(handler, COALESCE_WINDOW, MAX_BATCH)
+    logging.info(f"Watching directory: {WATCHED_DIR} ({backend.name} backend)")
+
+    try:
+        while True:
+            pipeline.push(backend.read_events(timeout=COALESCE_WINDOW))
+            pipeline.flush()
+    finally:
+        backend.close()
+        if hashes is not None:
+            hashes.close()
+        if runner is not None:
+            runner.shutdown()
 
 if __name__ == "__main__":
     main()
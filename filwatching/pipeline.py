@@ -0,0 +1,148 @@
+import time
+import queue
+import logging
+import threading
+from collections import namedtuple
+
+from backends import CREATED, DELETED, MODIFIED, MOVED
+
+# kind is one of CREATED, DELETED, MODIFIED or MOVED; dest is only set for MOVED
+Event = namedtuple("Event", "kind path dest")
+
+# Net effect of two events on the same path: (earlier, later) -> result.
+# None means the two cancel out (created then deleted within the window).
+COALESCE = {
+    (CREATED, MODIFIED): CREATED,
+    (CREATED, DELETED): None,
+    (MODIFIED, MODIFIED): MODIFIED,
+    (MODIFIED, DELETED): DELETED,
+    (DELETED, CREATED): MODIFIED,  # Replaced, e.g. an editor's atomic save
+    (DELETED, MODIFIED): MODIFIED,
+}
+
+
+class Pending:
+    __slots__ = ("kind", "inode", "last")
+
+    def __init__(self, kind, inode, last):
+        self.kind = kind
+        self.inode = inode
+        self.last = last
+
+
+class EventPipeline:
+    """
+    Debounce, coalesce and batch raw backend events.
+
+    Events for the same path are merged (see COALESCE) until the path has
+    been quiet for ``window`` seconds. A deletion and a creation carrying
+    the same inode are turned into a single MOVED event. Settled events are
+    handed to ``handler`` as lists of at most ``max_batch`` Event tuples, on
+    a separate dispatcher thread.
+
+    Back-pressure: at most ``max_queued`` batches wait for the handler.
+    When that queue is full, settled events simply stay pending and keep
+    being coalesced, so a slow handler never blocks the scanner; it just
+    receives fewer, more merged events.
+    """
+
+    def __init__(self, handler, window=0.5, max_batch=1000, max_queued=4):
+        self.handler = handler
+        self.window = window
+        self.max_batch = max_batch
+
+        self.pending = {}  # path -> Pending
+        self.batches = queue.Queue(max_queued)
+        self.stalled = False
+
+        threading.Thread(target=self._dispatch, daemon=True).start()
+
+    def push(self, events, now=None):
+        """Feed (event, path, inode) tuples from a backend."""
+        now = time.monotonic() if now is None else now
+
+        for kind, path, inode in events:
+            entry = self.pending.get(path)
+            if entry is None:
+                self.pending[path] = Pending(kind, inode, now)
+                continue
+
+            merged = COALESCE.get((entry.kind, kind), kind)
+            if merged is None:
+                del self.pending[path]
+                continue
+
+            entry.kind = merged
+            entry.last = now
+            if inode is not None and kind != DELETED:
+                entry.inode = inode
+
+    def flush(self, now=None, force=False):
+        """Queue the events that have settled; force=True ignores the window."""
+        now = time.monotonic() if now is None else now
+        cutoff = now - self.window
+
+        created = {
+            entry.inode: path
+            for path, entry in self.pending.items()
+            if entry.kind == CREATED and entry.inode is not None
+        }
+
+        events = []
+        done = []
+        moved = set()
+        for path, entry in self.pending.items():
+            if not force and entry.last > cutoff:
+                continue
+
+            if entry.kind == CREATED and created.get(entry.inode) == path:
+                continue  # Emitted below, once we know it is not a rename target
+
+            dest = created.get(entry.inode) if entry.kind == DELETED else None
+            if dest is not None and dest not in moved:
+                if not force and self.pending[dest].last > cutoff:
+                    continue  # Wait for the other half of the rename
+                events.append(Event(MOVED, path, dest))
+                done += [path, dest]
+                moved.add(dest)
+                continue
+
+            events.append(Event(entry.kind, path, None))
+            done.append(path)
+
+        for path in created.values():
+            if path in moved:
+                continue
+            if force or self.pending[path].last <= cutoff:
+                events.append(Event(CREATED, path, None))
+                done.append(path)
+
+        self._enqueue(events, done)
+
+    def _enqueue(self, events, done):
+        for start in range(0, len(events), self.max_batch):
+            batch = events[start:start + self.max_batch]
+            try:
+                self.batches.put_nowait(batch)
+            except queue.Full:
+                if not self.stalled:
+                    logging.warning("Event handler is falling behind, coalescing events")
+                    self.stalled = True
+                # Keep the rest pending; they merge with newer events meanwhile
+                delivered = {e.path for e in events[:start]}
+                delivered |= {e.dest for e in events[:start] if e.dest}
+                done = [p for p in done if p in delivered]
+                break
+        else:
+            self.stalled = False
+
+        for path in done:
+            del self.pending[path]
+
+    def _dispatch(self):
+        while True:
+            batch = self.batches.get()
+            try:
+                self.handler(batch)
+            except Exception:
+                logging.exception("Event handler failed")
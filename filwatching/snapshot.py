@@ -0,0 +1,145 @@
+import os
+from concurrent.futures import ThreadPoolExecutor
+
+from backends import CREATED, DELETED, MODIFIED
+
+
+class DirState:
+    """Cached listing of one directory, valid while its (mtime, inode) is unchanged."""
+
+    __slots__ = ("key", "files", "subdirs")
+
+    def __init__(self, key, files, subdirs):
+        self.key = key
+        self.files = files  # Names of watched files
+        self.subdirs = subdirs  # Names of subdirectories to descend into
+
+
+def stat_files(folder, names):
+    """(mtime, size, inode) of each name in folder, None for the ones that vanished."""
+    stats = []
+    for name in names:
+        try:
+            st = os.stat(os.path.join(folder, name))
+        except OSError:
+            stats.append(None)
+            continue
+        stats.append((st.st_mtime, st.st_size, st.st_ino))
+    return stats
+
+
+class SnapshotCache:
+    """
+    Incremental {path: (mtime, size, inode)} snapshot of a tree.
+
+    Each directory's listing is cached under its (mtime, inode). On refresh
+    a directory is only re-listed when that key changed, which is exactly
+    when entries were added, removed or renamed in it; otherwise the cached
+    names are reused and only the watched files are stat'ed, since editing
+    a file in place does not touch its directory. Changes are reported as
+    they are found, so no full-set diff is needed.
+
+    With workers > 1 the per-directory stat calls run on a thread pool,
+    which pays off on network shares and multi-core machines.
+    """
+
+    def __init__(self, directory, should_watch, excluded_dirs, workers=1):
+        self.directory = directory
+        self.should_watch = should_watch
+        self.excluded_dirs = excluded_dirs
+        self.pool = ThreadPoolExecutor(workers) if workers > 1 else None
+
+        self.dirs = {}  # directory path -> DirState
+        self.files = {}  # file path -> (mtime, size, inode)
+
+    def refresh(self):
+        """
+        Rescan the tree; returns a list of (event, path, inode) since the last
+        refresh. The inode lets the pipeline pair deletes with creates.
+        """
+        events = []
+        seen = set()
+        listed = []
+        stack = [self.directory]
+
+        while stack:
+            folder = stack.pop()
+            try:
+                st = os.stat(folder)
+            except OSError:
+                continue
+
+            key = (st.st_mtime_ns, st.st_ino)
+            state = self.dirs.get(folder)
+            if state is None or state.key != key:
+                state = self._relist(folder, key, state, events)
+
+            seen.add(folder)
+            listed.append((folder, state.files))
+            stack.extend(os.path.join(folder, d) for d in state.subdirs)
+
+        if self.pool is not None:
+            results = self.pool.map(lambda item: stat_files(*item), listed)
+        else:
+            results = (stat_files(folder, names) for folder, names in listed)
+
+        for (folder, names), stats in zip(listed, results):
+            self._compare(folder, names, stats, events)
+
+        for folder in self.dirs.keys() - seen:
+            self._forget(folder, self.dirs.pop(folder).files, events)
+
+        return events
+
+    def _relist(self, folder, key, old, events):
+        files = []
+        subdirs = []
+
+        try:
+            with os.scandir(folder) as it:
+                for entry in it:
+                    try:
+                        if entry.is_dir():
+                            # Same as os.walk: symlinked folders are not followed
+                            if entry.name not in self.excluded_dirs and not entry.is_symlink():
+                                subdirs.append(entry.name)
+                            continue
+                    except OSError:
+                        pass
+                    if self.should_watch(entry.path):
+                        files.append(entry.name)
+        except OSError:
+            pass  # Removed or unreadable since it was stat'ed
+
+        if old is not None:
+            self._forget(folder, set(old.files).difference(files), events)
+
+        state = self.dirs[folder] = DirState(key, files, subdirs)
+        return state
+
+    def _compare(self, folder, names, stats, events):
+        known = self.files
+        for name, stat in zip(names, stats):
+            path = os.path.join(folder, name)
+
+            if stat is None:
+                # Vanished since the listing; the folder's mtime changed too,
+                # so it will be re-listed on the next refresh
+                previous = known.pop(path, None)
+                if previous is not None:
+                    events.append((DELETED, path, previous[2]))
+                continue
+
+            previous = known.get(path)
+            if previous is None:
+                events.append((CREATED, path, stat[2]))
+            elif previous[:2] != stat[:2]:  # mtime or size
+                events.append((MODIFIED, path, stat[2]))
+            known[path] = stat
+
+    def _forget(self, folder, names, events):
+        for name in names:
+            path = os.path.join(folder, name)
+            previous = self.files.pop(path, None)
+            if previous is not None:
+                events.append((DELETED, path, previous[2]))
@@ -0,0 +1,71 @@
+import time
+import random
+import fnmatch
+import argparse
+
+from matcher import compile_patterns
+
+EXTENSIONS = [
+    "py", "md", "txt", "c", "h", "cpp", "js", "ts", "json", "yml", "toml",
+    "png", "jpg", "gif", "svg", "css", "html", "rs", "go", "java", "kt",
+    "sh", "bat", "ps1", "ini", "cfg", "log", "csv", "xml", "pdf", "zip",
+    "gz", "tar", "o", "so", "dll", "exe", "lock", "sql", "rb", "php",
+    "lua", "pl", "r", "m", "swift", "scala", "dart", "vue", "tex",
+]
+
+
+def make_names(count, seed=0):
+    rng = random.Random(seed)
+    return [
+        f"file_{rng.randrange(10**6)}.{rng.choice(EXTENSIONS)}"
+        for _ in range(count)
+    ]
+
+
+def make_patterns(count):
+    patterns = [f"*.{ext}" for ext in EXTENSIONS[:max(count - 2, 1)]]
+    if count > 2:
+        patterns += ["*_test.py", "file_1?????.*"]
+    return patterns[:count]
+
+
+def fnmatch_loop(names, patterns):
+    return sum(
+        1 for name in names
+        if any(fnmatch.fnmatch(name, p) for p in patterns)
+    )
+
+
+def compiled(names, patterns):
+    match = compile_patterns(";".join(patterns))
+    return sum(1 for name in names if match(name))
+
+
+def timed(func, *args):
+    start = time.perf_counter()
+    result = func(*args)
+    return time.perf_counter() - start, result
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Compare per-file fnmatch against the compiled pattern matcher."
+    )
+    parser.add_argument("--names", type=int, default=200_000, help="Number of synthetic file names")
+    parser.add_argument("--counts", default="1,5,20,50", help="Comma-separated pattern counts")
+    args = parser.parse_args()
+
+    names = make_names(args.names)
+    print(f"{args.names} names")
+    print(f"{'patterns':>8}  {'fnmatch':>10}  {'compiled':>10}  {'speedup':>8}")
+
+    for count in (int(c) for c in args.counts.split(",")):
+        patterns = make_patterns(count)
+        slow, expected = timed(fnmatch_loop, names, patterns)
+        fast, found = timed(compiled, names, patterns)
+        assert found == expected, (found, expected)
+        print(f"{count:>8}  {slow:>9.3f}s  {fast:>9.3f}s  {slow / fast:>7.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,219 @@
+import os
+import time
+import queue
+import sqlite3
+import hashlib
+import threading
+
+from walker import BATCH_SIZE, DONE
+
+INDEX_DIR = os.path.join(os.path.expanduser("~"), ".cache", "filetools", "findfiles")
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT);
+CREATE TABLE IF NOT EXISTS dirs (
+    id INTEGER PRIMARY KEY,
+    path TEXT UNIQUE NOT NULL,
+    parent INTEGER,
+    mtime_ns INTEGER
+);
+CREATE TABLE IF NOT EXISTS files (
+    dir INTEGER NOT NULL,
+    name TEXT NOT NULL,
+    size INTEGER,
+    mtime_ns INTEGER
+);
+CREATE INDEX IF NOT EXISTS files_dir ON files(dir);
+"""
+
+
+def index_path(root, index_dir=INDEX_DIR):
+    key = hashlib.sha1(os.path.abspath(root).encode("utf-8", "surrogateescape"))
+    return os.path.join(index_dir, key.hexdigest()[:16] + ".sqlite")
+
+
+class FileIndex:
+    """
+    On-disk SQLite index of every file under one root, with size and mtime.
+
+    A refresh stats each known folder and only re-lists the folders whose
+    mtime changed since the last run; unchanged folders keep their rows.
+    Renames, creations and deletions always bump the parent folder's mtime,
+    so the set of paths is exact. Sizes and mtimes of files edited in place
+    are only updated when their folder is re-listed for another reason.
+    """
+
+    def __init__(self, root, index_dir=INDEX_DIR):
+        self.root = os.path.abspath(root)
+        os.makedirs(index_dir, exist_ok=True)
+
+        self.db = sqlite3.connect(index_path(self.root, index_dir))
+        self.db.executescript(SCHEMA)
+        self.db.execute(
+            "INSERT OR REPLACE INTO meta VALUES ('root', ?)", (self.root,)
+        )
+
+    def close(self):
+        self.db.close()
+
+    def age(self):
+        """Seconds since the last completed refresh, None if never refreshed."""
+        row = self.db.execute(
+            "SELECT value FROM meta WHERE key = 'refreshed'"
+        ).fetchone()
+        return None if row is None else time.time() - float(row[0])
+
+    def refresh(self, cancel=None):
+        """
+        Bring the index up to date; returns (folders checked, folders re-listed).
+
+        cancel (threading.Event): Abort early, leaving the previous index intact.
+        """
+        known = {}
+        children = {}
+        for dir_id, path, parent, mtime_ns in self.db.execute(
+            "SELECT id, path, parent, mtime_ns FROM dirs"
+        ):
+            known[path] = (dir_id, mtime_ns)
+            children.setdefault(parent, []).append(path)
+
+        seen = set()
+        checked = rescanned = 0
+        stack = [(self.root, None)]
+
+        with self.db:
+            while stack:
+                if cancel is not None and cancel.is_set():
+                    self.db.rollback()
+                    return checked, rescanned
+
+                path, parent = stack.pop()
+                try:
+                    mtime_ns = os.stat(path).st_mtime_ns
+                except OSError:
+                    continue
+
+                checked += 1
+                dir_id, old_mtime = known.get(path, (None, None))
+
+                if dir_id is not None and old_mtime == mtime_ns:
+                    seen.add(dir_id)
+                    stack.extend((p, dir_id) for p in children.get(dir_id, ()))
+                    continue
+
+                rescanned += 1
+                dir_id = self._rescan(path, parent, dir_id, mtime_ns, stack)
+                seen.add(dir_id)
+
+            gone = [(i,) for i, _ in known.values() if i not in seen]
+            self.db.executemany("DELETE FROM files WHERE dir = ?", gone)
+            self.db.executemany("DELETE FROM dirs WHERE id = ?", gone)
+            self.db.execute(
+                "INSERT OR REPLACE INTO meta VALUES ('refreshed', ?)",
+                (str(time.time()),),
+            )
+
+        return checked, rescanned
+
+    def _rescan(self, path, parent, dir_id, mtime_ns, stack):
+        files = []
+        subdirs = []
+
+        try:
+            with os.scandir(path) as it:
+                for entry in it:
+                    try:
+                        if entry.is_dir():
+                            if not entry.is_symlink():
+                                subdirs.append(entry.path)
+                            continue
+                        st = entry.stat()
+                    except OSError:
+                        try:
+                            st = entry.stat(follow_symlinks=False)
+                        except OSError:
+                            continue
+                    files.append((entry.name, st.st_size, st.st_mtime_ns))
+        except OSError:
+            pass
+
+        if dir_id is None:
+            dir_id = self.db.execute(
+                "INSERT INTO dirs (path, parent, mtime_ns) VALUES (?, ?, ?)",
+                (path, parent, mtime_ns),
+            ).lastrowid
+        else:
+            self.db.execute(
+                "UPDATE dirs SET parent = ?, mtime_ns = ? WHERE id = ?",
+                (parent, mtime_ns, dir_id),
+            )
+            self.db.execute("DELETE FROM files WHERE dir = ?", (dir_id,))
+
+        self.db.executemany(
+            "INSERT INTO files VALUES (?, ?, ?, ?)",
+            [(dir_id, name, size, mtime) for name, size, mtime in files],
+        )
+        stack.extend((p, dir_id) for p in subdirs)
+        return dir_id
+
+    def query(self, match, batch_size=BATCH_SIZE):
+        """Yield lists of indexed paths whose file name satisfies match()."""
+        dirs = dict(self.db.execute("SELECT id, path FROM dirs"))
+        self.db.create_function("matches", 1, match, deterministic=True)
+
+        cursor = self.db.execute(
+            "SELECT dir, name FROM files WHERE matches(name)"
+        )
+        while True:
+            rows = cursor.fetchmany(batch_size)
+            if not rows:
+                return
+            yield [os.path.join(dirs[d], name) for d, name in rows]
+
+
+class IndexedSearch:
+    """
+    Run a search against the persistent index on a background thread.
+
+    Mirrors the ParallelWalker interface (start, cancel, results, DONE) so
+    the UI can drain either one the same way. The index is refreshed before
+    every query; that only stats folders, so results are never stale.
+    """
+
+    def __init__(self, folder, match, index_dir=INDEX_DIR):
+        self.folder = folder
+        self.match = match
+        self.index_dir = index_dir
+
+        self.results = queue.Queue()
+        self.dirs_scanned = 0
+        self.error = None
+
+        self._cancel = threading.Event()
+
+    @property
+    def cancelled(self):
+        return self._cancel.is_set()
+
+    def start(self):
+        threading.Thread(target=self._run, daemon=True).start()
+
+    def cancel(self):
+        self._cancel.set()
+
+    def _run(self):
+        try:
+            index = FileIndex(self.folder, self.index_dir)
+            try:
+                self.dirs_scanned, _ = index.refresh(self._cancel)
+
+                for batch in index.query(self.match):
+                    if self._cancel.is_set():
+                        break
+                    self.results.put(batch)
+            finally:
+                index.close()
+        except sqlite3.Error as e:
+            self.error = e
+        finally:
+            self.results.put(DONE)
@@ -1,8 +1,20 @@
 import os
-import fnmatch
+import time
+import queue
+from itertools import islice
 import tkinter as tk
 from tkinter import ttk, filedialog, messagebox
 
+from walker import ParallelWalker, DONE
+from fileindex import IndexedSearch
+from matcher import compile_patterns
+from resultview import ResultStore, VirtualList
+from grep import ContentSearch, compile_query
+
+POLL_MS = 50  # How often the results queue is drained
+POLL_BUDGET = 0.03  # Seconds spent inserting results per drain
+CLIPBOARD_CHUNK = 10000  # Rows handed to the clipboard per call
+
 
 class FileFinderApp:
     def __init__(self, root):
@@ -10,7 +22,8 @@ class FileFinderApp:
         self.root.title("Recursive File Finder")
         self.root.geometry("900x600")
 
-        self.matches = []
+        self.matches = ResultStore()
+        self.walker = None
 
         # ---------- Folder ----------
         folder_frame = ttk.Frame(root)
@@ -33,7 +46,7 @@ class FileFinderApp:
         pattern_frame = ttk.Frame(root)
         pattern_frame.pack(fill="x", padx=10)
 
-        ttk.Label(pattern_frame, text="File Name / Pattern:").pack(side="left")
+        ttk.Label(pattern_frame, text="File Name / Patterns (;):").pack(side="left")
 
         self.pattern_var = tk.StringVar(value="*.txt")
         ttk.Entry(
@@ -48,26 +61,53 @@ class FileFinderApp:
             command=self.search
         ).pack(side="left", padx=5)
 
+        ttk.Button(
+            pattern_frame,
+            text="Stop",
+            command=self.stop
+        ).pack(side="left")
+
+        self.use_index = tk.BooleanVar(value=False)
+        ttk.Checkbutton(
+            pattern_frame,
+            text="Use index",
+            variable=self.use_index
+        ).pack(side="left", padx=10)
+
+        # ---------- Content ----------
+        content_frame = ttk.Frame(root)
+        content_frame.pack(fill="x", padx=10, pady=(5, 0))
+
+        ttk.Label(content_frame, text="Containing Text:").pack(side="left")
+
+        self.content_var = tk.StringVar()
+        ttk.Entry(
+            content_frame,
+            textvariable=self.content_var,
+            width=40
+        ).pack(side="left", padx=5)
+
+        self.content_regex = tk.BooleanVar(value=False)
+        ttk.Checkbutton(
+            content_frame,
+            text="Regex",
+            variable=self.content_regex
+        ).pack(side="left", padx=5)
+
+        self.content_ignore_case = tk.BooleanVar(value=False)
+        ttk.Checkbutton(
+            content_frame,
+            text="Ignore case (ASCII)",
+            variable=self.content_ignore_case
+        ).pack(side="left", padx=5)
+
         # ---------- Status ----------
         self.status = ttk.Label(root, text="Ready")
         self.status.pack(anchor="w", padx=10, pady=5)
 
         # ---------- Results ----------
-        frame = ttk.Frame(root)
-        frame.pack(fill="both", expand=True, padx=10, pady=5)
-
-        scrollbar = ttk.Scrollbar(frame)
-        scrollbar.pack(side="right", fill="y")
-
-        self.listbox = tk.Listbox(
-            frame,
-            font=("Consolas", 10),
-            selectmode="extended",
-            yscrollcommand=scrollbar.set
-        )
-
-        self.listbox.pack(fill="both", expand=True)
-        scrollbar.config(command=self.listbox.yview)
+        self.results = VirtualList(root, self.matches, font=("Consolas", 10))
+        self.results.pack(fill="both", expand=True, padx=10, pady=5)
 
         # ---------- Buttons ----------
         button_frame = ttk.Frame(root)
@@ -111,31 +151,101 @@ class FileFinderApp:
     def search(self):
         folder = self.folder_var.get().strip()
         pattern = self.pattern_var.get().strip()
+        content = self.content_var.get()
 
         if not os.path.isdir(folder):
             messagebox.showerror("Error", "Please select a valid folder.")
             return
 
-        self.listbox.delete(0, tk.END)
-        self.matches = []
+        try:
+            # With a content query an empty name pattern means every file
+            match = compile_patterns(pattern or ("*" if content else ""))
+            query = compile_query(
+                content,
+                regex=self.content_regex.get(),
+                ignore_case=self.content_ignore_case.get()
+            ) if content else None
+        except ValueError as e:
+            messagebox.showerror("Error", str(e))
+            return
+
+        self.stop()
+        self.reset_results()
 
         self.status.config(text="Searching...")
-        self.root.update()
 
-        for root_dir, dirs, files in os.walk(folder):
-            for file in files:
-                if fnmatch.fnmatch(file, pattern):
-                    path = os.path.join(root_dir, file)
-                    self.matches.append(path)
-                    self.listbox.insert(tk.END, path)
+        engine = IndexedSearch if self.use_index.get() else ParallelWalker
+        self.walker = engine(folder, match)
+        if query is not None:
+            self.walker = ContentSearch(self.walker, query)
+        self.walker.start()
+        self.root.after(POLL_MS, self.poll_results, self.walker)
+
+    def stop(self):
+        if self.walker is not None:
+            self.walker.cancel()
+
+    def poll_results(self, walker):
+        # A newer search replaced this one; let its results go
+        if walker is not self.walker:
+            return
+
+        deadline = time.perf_counter() + POLL_BUDGET
+        done = False
+
+        while time.perf_counter() < deadline:
+            try:
+                batch = walker.results.get_nowait()
+            except queue.Empty:
+                break
+
+            if batch is DONE:
+                done = True
+                break
+
+            self.matches.extend(batch)
+
+        self.results.refresh()
+
+        if not done:
+            self.status.config(
+                text=f"Searching... {self.describe_matches(walker)} in "
+                     f"{walker.dirs_scanned} folder(s)"
+            )
+            self.root.after(POLL_MS, self.poll_results, walker)
+            return
 
-        if self.matches:
+        self.walker = None
+
+        if getattr(walker, "error", None):
+            messagebox.showerror("Index Error", str(walker.error))
+
+        if walker.cancelled:
             self.status.config(
-                text=f"Found {len(self.matches)} matching file(s)."
+                text=f"Stopped. Found {self.describe_matches(walker)}."
+            )
+        elif self.matches:
+            self.status.config(
+                text=f"Found {self.describe_matches(walker)}."
             )
         else:
             self.status.config(text="No matching files found.")
-            self.listbox.insert(tk.END, "*** No files found ***")
+            self.results.empty_text = "*** No files found ***"
+            self.results.refresh()
+
+    def describe_matches(self, walker):
+        # Content searches list one row per matching line
+        files = getattr(walker, "files_matched", None)
+        if files is None:
+            return f"{len(self.matches)} matching file(s)"
+        return f"{len(self.matches)} hit(s) in {files} file(s)"
+
+    def reset_results(self):
+        self.matches = ResultStore()
+        self.results.store = self.matches
+        self.results.empty_text = ""
+        self.results.top = 0
+        self.results.clear_selection()
 
     def export_txt(self):
         if not self.matches:
@@ -150,32 +260,37 @@ class FileFinderApp:
         if filename:
             with open(filename, "w", encoding="utf-8") as f:
                 f.write(f"Matches: {len(self.matches)}\n\n")
-                for item in self.matches:
-                    f.write(item + "\n")
+                f.writelines(item + "\n" for item in self.matches)
 
             messagebox.showinfo("Saved", "Results exported successfully.")
 
     def copy_selected(self):
-        sel = self.listbox.curselection()
-
-        if not sel:
+        if not self.results.has_selection():
             return
 
-        text = "\n".join(self.listbox.get(i) for i in sel)
-
-        self.root.clipboard_clear()
-        self.root.clipboard_append(text)
+        self.copy_rows(self.matches.iter_rows(self.results.selected()))
 
     def copy_all(self):
         if not self.matches:
             return
 
+        self.copy_rows(iter(self.matches))
+
+    def copy_rows(self, rows):
+        # Hand the clipboard bounded chunks instead of one giant string
         self.root.clipboard_clear()
-        self.root.clipboard_append("\n".join(self.matches))
+        separator = ""
+        while True:
+            chunk = list(islice(rows, CLIPBOARD_CHUNK))
+            if not chunk:
+                break
+            self.root.clipboard_append(separator + "\n".join(chunk))
+            separator = "\n"
 
     def clear(self):
-        self.matches = []
-        self.listbox.delete(0, tk.END)
+        self.stop()
+        self.walker = None
+        self.reset_results()
         self.status.config(text="Ready")
 
 
@@ -0,0 +1,187 @@
+import os
+import re
+import mmap
+import queue
+import threading
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor, FIRST_COMPLETED, wait
+
+from walker import DONE
+
+BINARY_BLOCK = 8192  # Bytes sniffed for NUL to decide a file is binary
+MMAP_THRESHOLD = 1 << 20  # Files at least this big are mapped, not read
+SNIPPET = 160  # Characters of context shown around a match
+MAX_HITS = 100  # Lines reported per file
+CHUNK_FILES = 64  # Files handed to a worker process per task
+
+
+def compile_query(text, regex=False, ignore_case=False):
+    """
+    Compile a literal or regex query into a bytes pattern; raises ValueError.
+
+    ^ and $ match at every line, as in grep. The pattern runs on raw bytes,
+    so ignore_case only folds ASCII letters.
+    """
+    source = text.encode("utf-8") if regex else re.escape(text.encode("utf-8"))
+    try:
+        return re.compile(source, re.MULTILINE | (re.IGNORECASE if ignore_case else 0))
+    except re.error as e:
+        raise ValueError(f"Invalid regex: {e}") from None
+
+
+def is_binary(block):
+    return b"\0" in block
+
+
+def scan_file(path, pattern, max_hits=MAX_HITS):
+    """Return [(line number, snippet)] for the lines of a text file matching pattern."""
+    hits = []
+
+    try:
+        with open(path, "rb") as f:
+            head = f.read(BINARY_BLOCK)
+            if not head or is_binary(head):
+                return hits
+
+            if os.fstat(f.fileno()).st_size >= MMAP_THRESHOLD:
+                data = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+            else:
+                data = head + f.read()
+
+            try:
+                line = 1
+                pos = 0
+                next_line = 0
+
+                for m in pattern.finditer(data):
+                    start = m.start()
+                    if start < next_line:
+                        continue  # Line already reported
+
+                    line += data[pos:start].count(b"\n")
+                    pos = start
+
+                    line_start = data.rfind(b"\n", 0, start) + 1
+                    line_end = data.find(b"\n", start)
+                    if line_end == -1:
+                        line_end = len(data)
+
+                    left = max(line_start, start - SNIPPET // 2)
+                    right = min(line_end, left + SNIPPET)
+                    snippet = data[left:right].decode("utf-8", "replace").strip()
+                    hits.append((line, snippet))
+
+                    next_line = line_end + 1
+                    if len(hits) >= max_hits:
+                        break
+            finally:
+                if isinstance(data, mmap.mmap):
+                    data.close()
+    except (OSError, ValueError):
+        pass  # Unreadable, vanished or empty-for-mmap file
+
+    return hits
+
+
+def scan_chunk(paths, source, flags):
+    """Worker entry point: scan several files, return [(path, display suffix)]."""
+    pattern = re.compile(source, flags)  # Cached by re per process
+    rows = []
+    for path in paths:
+        for line, snippet in scan_file(path, pattern):
+            rows.append((path, f":{line}: {snippet}"))
+    return rows
+
+
+class ContentSearch:
+    """
+    Grep the files found by a name search across a pool of processes.
+
+    ``names`` is a ParallelWalker or IndexedSearch that produces candidate
+    files; they are sent to workers in chunks and the matching lines are
+    streamed through ``self.results`` as (path, ":line: snippet") rows,
+    followed by ``DONE``; ``files_matched`` counts the files they come
+    from. Same start/cancel interface as the name engines.
+    """
+
+    def __init__(self, names, pattern, workers=None):
+        self.names = names
+        self.pattern = pattern
+        self.workers = workers or os.cpu_count() or 1
+
+        self.results = queue.Queue()
+        self.files_scanned = 0
+        self.files_matched = 0
+
+        self._error = None
+        self._cancel = threading.Event()
+
+    @property
+    def cancelled(self):
+        return self._cancel.is_set()
+
+    @property
+    def dirs_scanned(self):
+        return self.names.dirs_scanned
+
+    @property
+    def error(self):
+        return self._error or getattr(self.names, "error", None)
+
+    def start(self):
+        self.names.start()
+        threading.Thread(target=self._run, daemon=True).start()
+
+    def cancel(self):
+        self._cancel.set()
+        self.names.cancel()
+
+    def _run(self):
+        # Spawn rather than fork: the Tk process already runs other threads
+        executor = ProcessPoolExecutor(
+            self.workers,
+            mp_context=multiprocessing.get_context("spawn"),
+        )
+        pending = set()
+        chunk = []
+        names_done = False
+
+        try:
+            while not self._cancel.is_set():
+                # Keep a bounded number of chunks in flight
+                while not names_done and len(pending) < self.workers * 2:
+                    try:
+                        batch = self.names.results.get(timeout=0.05)
+                    except queue.Empty:
+                        break
+                    if batch is DONE:
+                        names_done = True
+                    else:
+                        chunk.extend(batch)
+
+                    while len(chunk) >= CHUNK_FILES or (names_done and chunk):
+                        pending.add(self._submit(executor, chunk[:CHUNK_FILES]))
+                        chunk = chunk[CHUNK_FILES:]
+
+                if names_done and not pending:
+                    break
+
+                if pending:
+                    done, pending = wait(pending, timeout=0.05, return_when=FIRST_COMPLETED)
+                    for future in done:
+                        rows = future.result()
+                        if rows:
+                            self.files_matched += len({path for path, _ in rows})
+                            self.results.put(rows)
+        except Exception as e:
+            self._error = e
+            self.names.cancel()
+        finally:
+            executor.shutdown(wait=False, cancel_futures=True)
+            self.results.put(DONE)
+
+    def _submit(self, executor, paths):
+        self.files_scanned += len(paths)
+        return executor.submit(
+            scan_chunk, paths, self.pattern.pattern, self.pattern.flags
+        )
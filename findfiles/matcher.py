@@ -0,0 +1,98 @@
+import os
+import re
+import fnmatch
+
+SEPARATOR = ";"
+REGEX_PREFIX = "re:"
+WILDCARDS = set("*?[")
+
+# fnmatch.fnmatch compares os.path.normcase'd names, so follow the platform
+FOLD_CASE = os.path.normcase("A") == "a"
+
+
+class PatternMatcher:
+    """
+    Match file names against many globs and regexes compiled once.
+
+    Patterns are sorted into the cheapest check that can answer them:
+
+    - plain names ("Makefile") go into a set,
+    - extension globs ("*.py") go into a set looked up by the name's extension,
+    - other literal-suffix globs ("*_test.py") share one str.endswith call,
+    - everything else, including "re:" patterns, is merged into a single regex.
+
+    So the cost per file stays flat however many patterns are given. Globs
+    follow fnmatch rules and must match the whole name; regexes are searched.
+    """
+
+    def __init__(self, patterns):
+        self.patterns = list(patterns)
+        self.match_all = False
+        self.names = set()
+        self.extensions = set()
+        self.suffixes = ()
+        self.regex = None
+
+        suffixes = []
+        parts = []
+
+        for pattern in self.patterns:
+            if pattern.startswith(REGEX_PREFIX):
+                parts.append(pattern[len(REGEX_PREFIX):])
+                continue
+
+            if FOLD_CASE:
+                pattern = pattern.lower()
+
+            if pattern == "*":
+                self.match_all = True
+            elif not WILDCARDS & set(pattern):
+                self.names.add(pattern)
+            elif pattern.startswith("*") and not WILDCARDS & set(pattern[1:]):
+                suffix = pattern[1:]
+                if suffix.startswith(".") and "." not in suffix[1:]:
+                    self.extensions.add(suffix)
+                else:
+                    suffixes.append(suffix)
+            else:
+                parts.append(r"\A" + fnmatch.translate(pattern))
+
+        self.suffixes = tuple(suffixes)
+
+        if parts:
+            try:
+                self.regex = re.compile(
+                    "|".join(f"(?:{p})" for p in parts),
+                    re.IGNORECASE if FOLD_CASE else 0,
+                )
+            except re.error as e:
+                raise ValueError(f"Invalid pattern: {e}") from None
+
+    def __call__(self, name):
+        if self.match_all:
+            return True
+
+        if FOLD_CASE:
+            name = name.lower()
+
+        if name in self.names:
+            return True
+
+        if self.extensions:
+            dot = name.rfind(".")
+            if dot != -1 and name[dot:] in self.extensions:
+                return True
+
+        if self.suffixes and name.endswith(self.suffixes):
+            return True
+
+        return self.regex is not None and self.regex.search(name) is not None
+
+
+def compile_patterns(text, sep=SEPARATOR):
+    """
+    Build a PatternMatcher from a separated pattern string,
+    e.g. "*.py;*.md;re:^test_". Raises ValueError on a bad regex.
+    """
+    patterns = [p.strip() for p in text.split(sep)]
+    return PatternMatcher(p for p in patterns if p)
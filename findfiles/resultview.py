@@ -0,0 +1,265 @@
+import os
+import tkinter as tk
+import tkinter.font as tkfont
+from array import array
+from tkinter import ttk
+
+ENCODING = "utf-8"
+ERRORS = "surrogateescape"  # Round-trips undecodable file names
+
+
+class ResultStore:
+    """
+    Compact, append-only store of result paths.
+
+    Each folder is kept once in ``dirs``; a row is just an index into it
+    plus the base name, packed into one bytes buffer. That costs about a
+    dozen bytes plus the name per row instead of a full Python string.
+    Rows may carry a display suffix (e.g. ":12: matched line"), packed the
+    same way and only allocated once the first one is added.
+    """
+
+    def __init__(self):
+        self.dirs = []
+        self._dir_ids = {}
+        self._dir_index = array("I")
+        self._offsets = array("Q", [0])
+        self._names = bytearray()
+        self._detail_offsets = None
+        self._details = None
+
+    def __len__(self):
+        return len(self._dir_index)
+
+    def __bool__(self):
+        return len(self._dir_index) > 0
+
+    def __getitem__(self, i):
+        if i < 0:
+            i += len(self)
+        name = self._names[self._offsets[i]:self._offsets[i + 1]]
+        path = os.path.join(
+            self.dirs[self._dir_index[i]],
+            name.decode(ENCODING, ERRORS),
+        )
+
+        if self._details is None:
+            return path
+
+        detail = self._details[self._detail_offsets[i]:self._detail_offsets[i + 1]]
+        return path + detail.decode(ENCODING, ERRORS)
+
+    def __iter__(self):
+        for i in range(len(self)):
+            yield self[i]
+
+    def append(self, path, detail=""):
+        if detail and self._details is None:
+            self._detail_offsets = array("Q", [0] * (len(self) + 1))
+            self._details = bytearray()
+
+        folder, name = os.path.split(path)
+
+        dir_id = self._dir_ids.get(folder)
+        if dir_id is None:
+            dir_id = self._dir_ids[folder] = len(self.dirs)
+            self.dirs.append(folder)
+
+        self._dir_index.append(dir_id)
+        self._names += name.encode(ENCODING, ERRORS)
+        self._offsets.append(len(self._names))
+
+        if self._details is not None:
+            self._details += detail.encode(ENCODING, ERRORS)
+            self._detail_offsets.append(len(self._details))
+
+    def extend(self, rows):
+        """Add rows given as paths or (path, detail) tuples."""
+        for row in rows:
+            if isinstance(row, tuple):
+                self.append(*row)
+            else:
+                self.append(row)
+
+    def iter_rows(self, rows):
+        for i in rows:
+            yield self[i]
+
+
+class VirtualList(ttk.Frame):
+    """
+    Scrollable list that only draws the rows currently in view.
+
+    Rows come from ``store``, anything with __len__ and __getitem__.
+    Supports click, Ctrl+click, Shift+click and Ctrl+A selection; the
+    selection is kept as sorted (first, last) ranges so selecting a
+    million rows costs one tuple.
+    """
+
+    def __init__(self, parent, store, font=("Consolas", 10), empty_text=""):
+        super().__init__(parent)
+
+        self.store = store
+        self.empty_text = empty_text
+        self.font = tkfont.Font(font=font)
+        self.row_height = self.font.metrics("linespace") + 2
+
+        self.top = 0
+        self.ranges = []
+        self.anchor = None
+
+        self.scrollbar = ttk.Scrollbar(self, command=self.yview)
+        self.scrollbar.pack(side="right", fill="y")
+
+        self.canvas = tk.Canvas(
+            self,
+            background="white",
+            highlightthickness=0,
+            takefocus=True,
+        )
+        self.canvas.pack(side="left", fill="both", expand=True)
+
+        self.canvas.bind("<Configure>", lambda e: self.redraw())
+        self.canvas.bind("<Button-1>", self._on_click)
+        self.canvas.bind("<Control-Button-1>", self._on_ctrl_click)
+        self.canvas.bind("<Shift-Button-1>", self._on_shift_click)
+        self.canvas.bind("<Control-a>", lambda e: self.select_all())
+        self.canvas.bind("<MouseWheel>", self._on_wheel)
+        self.canvas.bind("<Button-4>", lambda e: self.scroll(-3))
+        self.canvas.bind("<Button-5>", lambda e: self.scroll(3))
+        self.canvas.bind("<Up>", lambda e: self.scroll(-1))
+        self.canvas.bind("<Down>", lambda e: self.scroll(1))
+        self.canvas.bind("<Prior>", lambda e: self.scroll(-self.visible_rows()))
+        self.canvas.bind("<Next>", lambda e: self.scroll(self.visible_rows()))
+
+    # ---------- Scrolling ----------
+    def visible_rows(self):
+        return max(1, self.canvas.winfo_height() // self.row_height)
+
+    def scroll(self, rows):
+        self.set_top(self.top + rows)
+
+    def set_top(self, top):
+        top = min(top, len(self.store) - self.visible_rows())
+        self.top = max(0, top)
+        self.redraw()
+
+    def yview(self, *args):
+        if args[0] == "moveto":
+            self.set_top(int(float(args[1]) * len(self.store)))
+        elif args[0] == "scroll":
+            step = self.visible_rows() if args[2] == "pages" else 1
+            self.scroll(int(args[1]) * step)
+
+    def _on_wheel(self, event):
+        self.scroll(-3 if event.delta > 0 else 3)
+
+    # ---------- Drawing ----------
+    def refresh(self):
+        """Call after rows were added or removed from the store."""
+        self.redraw()
+
+    def redraw(self):
+        self.canvas.delete("all")
+        total = len(self.store)
+        rows = self.visible_rows()
+        width = self.canvas.winfo_width()
+
+        if not total:
+            self.scrollbar.set(0, 1)
+            if self.empty_text:
+                self.canvas.create_text(
+                    4, 1, anchor="nw", text=self.empty_text, font=self.font
+                )
+            return
+
+        end = min(total, self.top + rows + 1)
+        for i in range(self.top, end):
+            y = (i - self.top) * self.row_height
+            fill = "black"
+            if self.is_selected(i):
+                self.canvas.create_rectangle(
+                    0, y, width, y + self.row_height,
+                    fill="#3874d8", outline="",
+                )
+                fill = "white"
+            self.canvas.create_text(
+                4, y + 1, anchor="nw", text=self.store[i],
+                font=self.font, fill=fill,
+            )
+
+        self.scrollbar.set(self.top / total, min(1.0, (self.top + rows) / total))
+
+    # ---------- Selection ----------
+    def row_at(self, y):
+        i = self.top + y // self.row_height
+        return i if i < len(self.store) else None
+
+    def is_selected(self, i):
+        return any(lo <= i <= hi for lo, hi in self.ranges)
+
+    def selected(self):
+        """Yield the selected row numbers in order."""
+        for lo, hi in self.ranges:
+            yield from range(lo, hi + 1)
+
+    def has_selection(self):
+        return bool(self.ranges)
+
+    def select_all(self):
+        if self.store:
+            self.ranges = [(0, len(self.store) - 1)]
+            self.redraw()
+
+    def clear_selection(self):
+        self.ranges = []
+        self.anchor = None
+        self.redraw()
+
+    def _on_click(self, event):
+        self.canvas.focus_set()
+        i = self.row_at(event.y)
+        self.ranges = [] if i is None else [(i, i)]
+        self.anchor = i
+        self.redraw()
+
+    def _on_ctrl_click(self, event):
+        i = self.row_at(event.y)
+        if i is None:
+            return
+
+        if self.is_selected(i):
+            ranges = []
+            for lo, hi in self.ranges:
+                if lo <= i <= hi:
+                    if lo < i:
+                        ranges.append((lo, i - 1))
+                    if i < hi:
+                        ranges.append((i + 1, hi))
+                else:
+                    ranges.append((lo, hi))
+            self.ranges = ranges
+        else:
+            self._merge((i, i))
+
+        self.anchor = i
+        self.redraw()
+
+    def _on_shift_click(self, event):
+        i = self.row_at(event.y)
+        if i is None:
+            return
+
+        if self.anchor is None:
+            self.anchor = i
+        self.ranges = [(min(self.anchor, i), max(self.anchor, i))]
+        self.redraw()
+
+    def _merge(self, new):
+        merged = []
+        for lo, hi in sorted(self.ranges + [new]):
+            if merged and lo <= merged[-1][1] + 1:
+                merged[-1] = (merged[-1][0], max(merged[-1][1], hi))
+            else:
+                merged.append((lo, hi))
+        self.ranges = merged
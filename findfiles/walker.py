@@ -0,0 +1,114 @@
+import os
+import queue
+import threading
+
+BATCH_SIZE = 500
+DONE = None  # Sentinel put on the results queue when the walk is over
+
+
+def default_workers():
+    return min(32, (os.cpu_count() or 1) * 4)
+
+
+class ParallelWalker:
+    """
+    Walk a directory tree with os.scandir on a pool of worker threads.
+
+    Every worker takes one directory at a time, reports the matching files
+    in it and hands its subdirectories back to the pool, so independent
+    subtrees are scanned side by side. Matches are streamed in batches
+    through ``self.results``; ``DONE`` is put there once the walk ends.
+
+    Parameters:
+    - folder (str): Root of the tree to walk.
+    - match (callable): Takes a file name, returns True if it should be reported.
+    - workers (int): Number of scanning threads.
+    - batch_size (int): Maximum number of paths per results batch.
+    """
+
+    def __init__(self, folder, match, workers=None, batch_size=BATCH_SIZE):
+        self.folder = folder
+        self.match = match
+        self.workers = workers or default_workers()
+        self.batch_size = batch_size
+
+        self.results = queue.Queue()
+        self.dirs_scanned = 0
+
+        self._dirs = queue.Queue()
+        self._pending = 0
+        self._lock = threading.Lock()
+        self._cancel = threading.Event()
+
+    @property
+    def cancelled(self):
+        return self._cancel.is_set()
+
+    def start(self):
+        self._pending = 1
+        self._dirs.put(self.folder)
+
+        for _ in range(self.workers):
+            threading.Thread(target=self._work, daemon=True).start()
+
+    def cancel(self):
+        """Stop scanning; queued directories are drained without being read."""
+        self._cancel.set()
+
+    def _work(self):
+        while True:
+            folder = self._dirs.get()
+            if folder is None:
+                return
+
+            if not self._cancel.is_set():
+                self._scan(folder)
+
+            with self._lock:
+                self._pending -= 1
+                finished = self._pending == 0
+
+            if finished:
+                for _ in range(self.workers):
+                    self._dirs.put(None)
+                self.results.put(DONE)
+
+    def _scan(self, folder):
+        batch = []
+        subdirs = []
+
+        try:
+            with os.scandir(folder) as it:
+                for entry in it:
+                    # Same rules as os.walk: symlinked folders are listed
+                    # as folders but never followed.
+                    try:
+                        is_dir = entry.is_dir()
+                    except OSError:
+                        is_dir = False
+
+                    if is_dir:
+                        try:
+                            if not entry.is_symlink():
+                                subdirs.append(entry.path)
+                        except OSError:
+                            pass
+                        continue
+
+                    if self.match(entry.name):
+                        batch.append(entry.path)
+                        if len(batch) >= self.batch_size:
+                            self.results.put(batch)
+                            batch = []
+        except OSError:
+            pass  # Unreadable or vanished folder, same as os.walk
+
+        if batch:
+            self.results.put(batch)
+
+        with self._lock:
+            self.dirs_scanned += 1
+            self._pending += len(subdirs)
+
+        for path in subdirs:
+            self._dirs.put(path)
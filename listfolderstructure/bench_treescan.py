@@ -0,0 +1,101 @@
+import os
+import time
+import shutil
+import argparse
+import tempfile
+from pathlib import Path
+
+from treescan import scan_tree, iter_lines, stream_lines
+
+
+def build_tree(root, entries, fanout=20, files_per_dir=200):
+    """Create a synthetic tree of roughly `entries` files and folders."""
+    created = 0
+    level = [root]
+    while created < entries:
+        next_level = []
+        for folder in level:
+            for i in range(files_per_dir):
+                open(os.path.join(folder, f"file_{i}.txt"), "wb").close()
+            created += files_per_dir
+            for i in range(fanout):
+                sub = os.path.join(folder, f"dir_{i}")
+                os.mkdir(sub)
+                next_level.append(sub)
+            created += fanout
+            if created >= entries:
+                break
+        level = next_level
+    return created
+
+
+def iterdir_walk(path, lines, prefix=""):
+    """The previous Path.iterdir based walker, kept for comparison."""
+    entries = sorted(
+        [e for e in path.iterdir() if not e.name.startswith(".")],
+        key=lambda x: (x.is_file(), x.name.lower())
+    )
+    for i, entry in enumerate(entries):
+        last = i == len(entries) - 1
+        connector = "`-- " if last else "|-- "
+        if entry.is_file():
+            lines.append(f"{prefix}{connector}{entry.name} ({entry.stat().st_size})")
+        else:
+            lines.append(f"{prefix}{connector}{entry.name}/")
+            iterdir_walk(entry, lines, prefix + ("    " if last else "|   "))
+
+
+def format_entry(entry):
+    return f"{entry.name}/" if entry.is_dir else f"{entry.name} ({entry.size})"
+
+
+def scandir_walk(path, workers):
+    tree = scan_tree(path, workers=workers)
+    return list(iter_lines(tree, format_entry, "`-- [Permission Denied]"))
+
+
+def streamed_walk(path, workers):
+    return list(stream_lines(path, format_entry, "`-- [Permission Denied]", workers=workers))
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Compare the iterdir walker with the concurrent scandir tree builder."
+    )
+    parser.add_argument("--entries", type=int, default=500_000, help="Approximate size of the synthetic tree")
+    parser.add_argument("--workers", type=int, default=None, help="Threads for the scandir builder")
+    parser.add_argument("--keep", help="Build (or reuse) the tree here instead of a temp folder")
+    args = parser.parse_args()
+
+    root = args.keep or tempfile.mkdtemp(prefix="treebench_")
+    try:
+        if not os.listdir(root):
+            start = time.perf_counter()
+            count = build_tree(root, args.entries)
+            print(f"Built {count} entries in {time.perf_counter() - start:.1f}s")
+
+        start = time.perf_counter()
+        old = []
+        iterdir_walk(Path(root), old)
+        old_time = time.perf_counter() - start
+
+        start = time.perf_counter()
+        new = scandir_walk(root, args.workers)
+        new_time = time.perf_counter() - start
+
+        start = time.perf_counter()
+        streamed = streamed_walk(root, args.workers)
+        stream_time = time.perf_counter() - start
+
+        assert old == new == streamed, "outputs differ"
+        print(f"{len(new)} lines, identical output")
+        print(f"iterdir walk:  {old_time:.2f}s")
+        print(f"scandir tree:  {new_time:.2f}s  ({old_time / new_time:.1f}x)")
+        print(f"streamed:      {stream_time:.2f}s  ({old_time / stream_time:.1f}x)")
+    finally:
+        if not args.keep:
+            shutil.rmtree(root)
+
+
+if __name__ == "__main__":
+    main()
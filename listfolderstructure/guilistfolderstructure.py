@@ -1,12 +1,20 @@
+import os
+import time
+import queue
+import threading
 import tkinter as tk
 from tkinter import ttk, filedialog, messagebox
 from pathlib import Path
 
-# ASCII characters
-BRANCH = "|-- "
-LAST = "`-- "
-VERTICAL = "|   "
-SPACE = "    "
+from treescan import list_dir, stream_lines
+from treesnapshot import TreeSnapshot, ADDED
+from treeexport import load_export, export_lines
+
+POLL_MS = 50  # How often streamed lines are appended to the text box
+POLL_BUDGET = 0.03  # Seconds spent inserting lines per callback
+CHUNK_LINES = 2000  # Lines handed from the scanning thread at once
+CHUNK_SECONDS = 0.1  # ...or whatever is ready after this long
+SAVE_CHUNK = 5000  # Lines read from the text box per write when saving
 
 
 class FolderTreeGenerator:
@@ -23,57 +31,74 @@ class FolderTreeGenerator:
             size /= 1024
         return f"{size:.1f} PB"
 
-    def walk(
+    def format_entry(self, entry, show_sizes):
+        if entry.is_dir:
+            return f"{entry.name}/"
+
+        text = entry.name
+        if show_sizes and entry.size is not None:
+            text += f" ({self.format_size(entry.size)})"
+        return text
+
+    def stream(
         self,
-        folder,
-        prefix="",
-        depth=0,
+        root,
         max_depth=None,
         show_hidden=False,
         show_sizes=False,
+        snapshot=None,
     ):
-        if max_depth is not None and depth > max_depth:
-            return
+        scan = list_dir if snapshot is None else snapshot.scan()
+        yield str(root)
+        yield from stream_lines(
+            root,
+            lambda entry: self.format_entry(entry, show_sizes),
+            "[Permission Denied]",
+            max_depth,
+            show_hidden,
+            with_sizes=show_sizes,
+            lister=scan,
+        )
+        if snapshot is not None:
+            scan.commit()
 
-        try:
-            entries = sorted(
-                [
-                    e
-                    for e in folder.iterdir()
-                    if show_hidden or not e.name.startswith(".")
-                ],
-                key=lambda x: (x.is_file(), x.name.lower()),
-            )
-        except PermissionError:
-            self.lines.append(prefix + "[Permission Denied]")
+    def stream_diff(self, snapshot, max_depth=None, show_hidden=False):
+        """Rescan (sizes included) and yield what changed since the last scan."""
+        first = snapshot.previous is None and not snapshot.listings
+        for _ in self.stream(snapshot.root, max_depth, show_hidden, True, snapshot):
+            pass
+
+        if first:
+            yield f"No earlier snapshot of {snapshot.root}; this scan is the baseline."
             return
 
-        for i, entry in enumerate(entries):
-            last = i == len(entries) - 1
-            connector = LAST if last else BRANCH
-
-            if entry.is_dir():
-                self.lines.append(f"{prefix}{connector}{entry.name}/")
-                extension = SPACE if last else VERTICAL
-                self.walk(
-                    entry,
-                    prefix + extension,
-                    depth + 1,
-                    max_depth,
-                    show_hidden,
-                    show_sizes,
-                )
+        yield f"Changes in {snapshot.root} since the last snapshot:"
+        changed = False
+        for change, path, old, new in snapshot.diff(show_hidden):
+            changed = True
+            path = os.path.relpath(path, snapshot.root)
+            if change == ADDED:
+                detail = "" if new is None else f" ({self.format_size(new)})"
+            elif new is None:
+                detail = "" if old is None else f" ({self.format_size(old)})"
             else:
-                text = entry.name
-                if show_sizes:
-                    try:
-                        text += (
-                            f" ({self.format_size(entry.stat().st_size)})"
-                        )
-                    except Exception:
-                        pass
+                detail = f" ({self.format_size(old)} -> {self.format_size(new)})"
+            yield f"{change} {path}{detail}"
+
+        if not changed:
+            yield "No changes."
 
-                self.lines.append(prefix + connector + text)
+    def stream_export(self, filename, max_depth=None, show_sizes=False):
+        tree = load_export(filename)
+        if not len(tree):
+            return
+        yield tree.name(0)
+        yield from export_lines(
+            tree,
+            lambda entry: self.format_entry(entry, show_sizes),
+            "[Permission Denied]",
+            max_depth,
+        )
 
     def generate(
         self,
@@ -82,18 +107,45 @@ class FolderTreeGenerator:
         show_hidden=False,
         show_sizes=False,
     ):
-        self.lines = [str(root)]
-        self.walk(
-            root,
-            "",
-            0,
-            max_depth,
-            show_hidden,
-            show_sizes,
+        self.lines = list(
+            self.stream(root, max_depth, show_hidden, show_sizes)
         )
         return "\n".join(self.lines)
 
 
+class TreeJob:
+    """Runs a line generator on a thread and hands the lines over in chunks."""
+
+    def __init__(self, lines):
+        self.lines = lines
+        self.chunks = queue.Queue()
+        self.cancel = threading.Event()
+        self.first = True
+        self.error = None
+        threading.Thread(target=self.run, daemon=True).start()
+
+    def run(self):
+        chunk = []
+        flushed = time.perf_counter()
+        try:
+            for line in self.lines:
+                if self.cancel.is_set():
+                    break
+                chunk.append(line)
+
+                now = time.perf_counter()
+                if len(chunk) >= CHUNK_LINES or now - flushed > CHUNK_SECONDS:
+                    self.chunks.put(chunk)
+                    chunk = []
+                    flushed = now
+        except (OSError, ValueError) as e:
+            self.error = e
+        finally:
+            self.lines.close()
+            self.chunks.put(chunk)
+            self.chunks.put(None)
+
+
 class App:
 
     def __init__(self, root):
@@ -102,6 +154,8 @@ class App:
         self.root.geometry("1000x700")
 
         self.generator = FolderTreeGenerator()
+        self.job = None
+        self.snapshots = {}  # Folder -> TreeSnapshot of its last scan
 
         top = ttk.Frame(root)
         top.pack(fill="x", padx=10, pady=10)
@@ -155,6 +209,18 @@ class App:
             command=self.generate,
         ).pack(side="left")
 
+        ttk.Button(
+            buttons,
+            text="Diff Last Snapshot",
+            command=self.diff,
+        ).pack(side="left", padx=5)
+
+        ttk.Button(
+            buttons,
+            text="Open Export",
+            command=self.open_export,
+        ).pack(side="left", padx=5)
+
         ttk.Button(
             buttons,
             text="Save TXT",
@@ -185,7 +251,23 @@ class App:
         if folder:
             self.folder_var.set(folder)
 
-    def generate(self):
+    def max_depth(self):
+        """The Max Depth field as an int, None when empty; raises ValueError."""
+        if not self.depth.get().strip():
+            return None
+        return int(self.depth.get())
+
+    def start(self, lines):
+        if self.job is not None:
+            self.job.cancel.set()
+
+        self.text.delete("1.0", tk.END)
+
+        self.job = TreeJob(lines)
+        self.root.after(POLL_MS, self.append_lines, self.job)
+
+    def snapshot(self):
+        """The TreeSnapshot of the chosen folder, None after showing an error."""
         folder = self.folder_var.get()
 
         if not folder:
@@ -193,7 +275,7 @@ class App:
                 "Error",
                 "Choose a folder first.",
             )
-            return
+            return None
 
         path = Path(folder)
 
@@ -202,33 +284,115 @@ class App:
                 "Error",
                 "Folder not found.",
             )
+            return None
+
+        key = str(path.resolve())
+        if key not in self.snapshots:
+            self.snapshots[key] = TreeSnapshot(path)
+        return self.snapshots[key]
+
+    def generate(self):
+        snapshot = self.snapshot()
+        if snapshot is None:
+            return
+
+        try:
+            depth = self.max_depth()
+        except ValueError:
+            messagebox.showerror(
+                "Error",
+                "Depth must be an integer.",
+            )
+            return
+
+        self.start(
+            self.generator.stream(
+                snapshot.root,
+                max_depth=depth,
+                show_hidden=self.hidden.get(),
+                show_sizes=self.sizes.get(),
+                snapshot=snapshot,
+            )
+        )
+
+    def diff(self):
+        snapshot = self.snapshot()
+        if snapshot is None:
+            return
+
+        try:
+            depth = self.max_depth()
+        except ValueError:
+            messagebox.showerror(
+                "Error",
+                "Depth must be an integer.",
+            )
+            return
+
+        self.start(
+            self.generator.stream_diff(
+                snapshot,
+                max_depth=depth,
+                show_hidden=self.hidden.get(),
+            )
+        )
+
+    def open_export(self):
+        """Show a tree exported by listfolderstructure.py --export, without rescanning."""
+        filename = filedialog.askopenfilename(
+            filetypes=[
+                ("Tree Exports", "*.ftree *.ndjson *.jsonl"),
+                ("All Files", "*.*"),
+            ],
+        )
+        if not filename:
+            return
+
+        try:
+            depth = self.max_depth()
+        except ValueError:
+            messagebox.showerror(
+                "Error",
+                "Depth must be an integer.",
+            )
             return
 
-        depth = None
-        if self.depth.get().strip():
+        self.start(
+            self.generator.stream_export(
+                filename,
+                max_depth=depth,
+                show_sizes=self.sizes.get(),
+            )
+        )
+
+    def append_lines(self, job):
+        # Superseded by a newer Generate click
+        if job is not self.job:
+            return
+
+        deadline = time.perf_counter() + POLL_BUDGET
+
+        while time.perf_counter() < deadline:
             try:
-                depth = int(self.depth.get())
-            except ValueError:
-                messagebox.showerror(
-                    "Error",
-                    "Depth must be an integer.",
-                )
+                chunk = job.chunks.get_nowait()
+            except queue.Empty:
+                break
+
+            if chunk is None:
+                self.job = None
+                if job.error is not None:
+                    messagebox.showerror("Error", str(job.error))
                 return
 
-        tree = self.generator.generate(
-            path,
-            max_depth=depth,
-            show_hidden=self.hidden.get(),
-            show_sizes=self.sizes.get(),
-        )
+            if chunk:
+                text = "\n".join(chunk)
+                self.text.insert(tk.END, text if job.first else "\n" + text)
+                job.first = False
 
-        self.text.delete("1.0", tk.END)
-        self.text.insert("1.0", tree)
+        self.root.after(POLL_MS, self.append_lines, job)
 
     def save(self):
-        text = self.text.get("1.0", tk.END)
-
-        if not text.strip():
+        if not self.text.get("1.0", "2.0").strip():
             return
 
         filename = filedialog.asksaveasfilename(
@@ -237,8 +401,13 @@ class App:
         )
 
         if filename:
+            # Write in slices rather than copying the whole text at once
+            last = int(self.text.index("end").split(".")[0])
             with open(filename, "w", encoding="utf8") as f:
-                f.write(text)
+                for start in range(1, last, SAVE_CHUNK):
+                    f.write(
+                        self.text.get(f"{start}.0", f"{start + SAVE_CHUNK}.0")
+                    )
 
             messagebox.showinfo(
                 "Saved",
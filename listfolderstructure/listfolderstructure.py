@@ -1,6 +1,11 @@
 from pathlib import Path
+import os
+import sys
 import argparse
 
+from treescan import stream_lines, scan_tree, aggregate, heaviest, iter_lines
+from treeexport import iter_records, write_ndjson, write_columnar
+
 
 def format_size(size):
     units = ["B", "KB", "MB", "GB", "TB"]
@@ -11,49 +16,108 @@ def format_size(size):
     return f"{size:.1f} PB"
 
 
-def walk(path, prefix="", max_depth=None, depth=0, show_hidden=False):
-    if max_depth is not None and depth > max_depth:
-        return
-
-    try:
-        entries = sorted(
-            [
-                e for e in path.iterdir()
-                if show_hidden or not e.name.startswith(".")
-            ],
-            key=lambda x: (x.is_file(), x.name.lower())
-        )
-    except PermissionError:
-        print(prefix + "`-- [Permission Denied]")
-        return
-
-    for i, entry in enumerate(entries):
-        last = i == len(entries) - 1
-        connector = "`-- " if last else "|-- "
-
-        if entry.is_file():
-            size = format_size(entry.stat().st_size)
-            print(f"{prefix}{connector}{entry.name} ({size})")
-        else:
-            print(f"{prefix}{connector}{entry.name}/")
-            extension = "    " if last else "|   "
-            walk(
-                entry,
-                prefix + extension,
-                max_depth,
-                depth + 1,
-                show_hidden,
-            )
+def format_entry(entry):
+    if entry.is_dir:
+        return f"{entry.name}/"
+    if entry.size is None:
+        return entry.name
+    return f"{entry.name} ({format_size(entry.size)})"
+
+
+def walk(path, out, max_depth=None, show_hidden=False, workers=None):
+    lines = stream_lines(
+        path,
+        format_entry,
+        "`-- [Permission Denied]",
+        max_depth,
+        show_hidden,
+        workers=workers,
+    )
+    for line in lines:
+        out.write(line + "\n")
+
+
+def format_du_entry(entry):
+    if entry.is_dir:
+        return f"{entry.name}/ ({format_size(entry.total)}, {entry.count} files)"
+    return format_entry(entry)
+
+
+def scan_sizes(path, show_hidden=False, workers=None):
+    # Symlinks are not followed so nothing is counted twice
+    tree = scan_tree(path, show_hidden=show_hidden, workers=workers, follow_links=False)
+    return aggregate(tree)
+
+
+def du(path, out, max_depth=None, show_hidden=False, workers=None):
+    tree = scan_sizes(path, show_hidden, workers)
+    out.write(f"{path} ({format_size(tree.total)}, {tree.count} files)\n")
+    lines = iter_lines(
+        tree,
+        format_du_entry,
+        "`-- [Permission Denied]",
+        max_depth=max_depth,
+    )
+    for line in lines:
+        out.write(line + "\n")
+
+
+def top(path, out, n, show_hidden=False, workers=None):
+    tree = scan_sizes(path, show_hidden, workers)
+    out.write(f"{format_size(tree.total):>10}  {tree.count:>10} files  {path}\n")
+    for node in heaviest(tree, n):
+        out.write(f"{format_size(node.total):>10}  {node.count:>10} files  {node.path}\n")
+
+
+def export(path, filename, fmt=None, max_depth=None, show_hidden=False, workers=None):
+    if fmt is None:
+        fmt = "ndjson" if filename.endswith((".ndjson", ".jsonl")) else "columnar"
+
+    records = iter_records(path, max_depth, show_hidden, workers)
+    if fmt == "ndjson":
+        with open(filename, "w", encoding="utf8") as f:
+            return write_ndjson(records, f)
+
+    with open(filename, "wb") as f:
+        return write_columnar(records, f, {"root": str(path)})
 
 
 parser = argparse.ArgumentParser()
 parser.add_argument("folder", nargs="?", default=".")
 parser.add_argument("--depth", type=int)
 parser.add_argument("--hidden", action="store_true")
+parser.add_argument("--workers", type=int, help="Threads listing folders concurrently")
+parser.add_argument("-o", "--output", help="Write the tree to this file instead of stdout")
+parser.add_argument("--du", action="store_true", help="Show cumulative folder sizes and file counts")
+parser.add_argument("--top", type=int, metavar="N", help="Only list the N heaviest folders")
+parser.add_argument("--export", metavar="FILE", help="Write a machine-readable tree instead of the ASCII one")
+parser.add_argument(
+    "--format",
+    choices=["ndjson", "columnar"],
+    help="Export format (default: ndjson for .ndjson/.jsonl files, columnar otherwise)",
+)
 
 args = parser.parse_args()
 
 root = Path(args.folder).resolve()
 
-print(root)
-walk(root, max_depth=args.depth, show_hidden=args.hidden)
\ No newline at end of file
+out = open(args.output, "w", encoding="utf8", errors="surrogateescape") if args.output else sys.stdout
+
+try:
+    if args.export:
+        count = export(root, args.export, args.format, args.depth, args.hidden, args.workers)
+        out.write(f"Exported {count} entries to {args.export}\n")
+    elif args.top:
+        top(root, out, args.top, show_hidden=args.hidden, workers=args.workers)
+    elif args.du:
+        du(root, out, max_depth=args.depth, show_hidden=args.hidden, workers=args.workers)
+    else:
+        out.write(f"{root}\n")
+        walk(root, out, max_depth=args.depth, show_hidden=args.hidden, workers=args.workers)
+    out.flush()
+except BrokenPipeError:
+    # Reader went away (e.g. piped into head); stop quietly
+    os.dup2(os.open(os.devnull, os.O_WRONLY), sys.stdout.fileno())
+finally:
+    if out is not sys.stdout:
+        out.close()
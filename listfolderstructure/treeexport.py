@@ -0,0 +1,275 @@
+import sys
+import json
+import math
+import struct
+from array import array
+from itertools import accumulate
+
+from treescan import Node, stream_entries, LAST, BRANCH, SPACE, VERTICAL
+
+# Entry types, as stored in the columnar format
+FILE = 0
+DIR = 1
+DENIED = 2  # A folder that could not be listed
+TYPE_NAMES = ("file", "dir", "denied")
+
+MAGIC = b"FTREE1\n"
+ROW_GROUP = 65536  # Entries buffered before a row group is written
+ROWS = struct.Struct("<I")
+SWAP = sys.byteorder != "little"  # Arrays are stored little-endian
+
+
+def iter_records(path, max_depth=None, show_hidden=False, workers=None):
+    """
+    Yield (parent, name, type, size, mtime) for path and everything below.
+
+    Records come in display order and are numbered implicitly from 0, the
+    root, whose name is the full path and whose parent is -1. Unknown sizes
+    (folders) and mtimes are None. Symlinks are not followed.
+    """
+    parents = []  # Record index of the folder on the current branch at each depth
+    index = 0
+    entries = stream_entries(
+        path,
+        max_depth,
+        show_hidden,
+        workers=workers,
+        follow_links=False,
+        with_mtime=True,
+    )
+    try:
+        for depth, last, node in entries:
+            if node.denied:
+                kind = DENIED
+            else:
+                kind = DIR if node.is_dir else FILE
+
+            yield (
+                parents[depth - 1] if depth else -1,
+                node.name if depth else str(path),
+                kind,
+                node.size,
+                node.mtime,
+            )
+
+            if node.is_dir:
+                del parents[depth:]
+                parents.append(index)
+            index += 1
+    finally:
+        entries.close()
+
+
+def write_ndjson(records, f):
+    """
+    One JSON object per line: id, parent, name, type, size, mtime. Output
+    is ASCII, so names that are not valid UTF-8 survive as \\udcXX escapes.
+    """
+    count = 0
+    for count, (parent, name, kind, size, mtime) in enumerate(records, 1):
+        f.write(json.dumps({
+            "id": count - 1,
+            "parent": parent,
+            "name": name,
+            "type": TYPE_NAMES[kind],
+            "size": size,
+            "mtime": mtime,
+        }) + "\n")
+    return count
+
+
+class ColumnarWriter:
+    """
+    Write records as row groups of parent, size, mtime, type and name columns.
+
+    File layout: MAGIC, a length-prefixed JSON header, then row groups of
+    <row count> parent[q] size[q] mtime[d] type[B] name_length[I] names,
+    closed by a row group of 0 rows. Sizes are -1 and mtimes NaN when
+    unknown; names are UTF-8 (with surrogateescape). Only one row group is
+    held in memory, however large the tree.
+    """
+
+    def __init__(self, f, header=None, row_group=ROW_GROUP):
+        self.f = f
+        self.row_group = row_group
+        self.count = 0
+        self._reset()
+
+        meta = json.dumps(header or {}).encode("utf-8")
+        f.write(MAGIC + ROWS.pack(len(meta)) + meta)
+
+    def _reset(self):
+        self.parent = array("q")
+        self.size = array("q")
+        self.mtime = array("d")
+        self.type = bytearray()
+        self.name_length = array("I")
+        self.names = bytearray()
+
+    def add(self, parent, name, kind, size, mtime):
+        encoded = name.encode("utf-8", "surrogateescape")
+        self.parent.append(parent)
+        self.size.append(-1 if size is None else size)
+        self.mtime.append(math.nan if mtime is None else mtime)
+        self.type.append(kind)
+        self.name_length.append(len(encoded))
+        self.names += encoded
+        self.count += 1
+
+        if len(self.type) >= self.row_group:
+            self.flush()
+
+    def flush(self):
+        rows = len(self.type)
+        if not rows:
+            return
+        self.f.write(ROWS.pack(rows))
+        for column in (self.parent, self.size, self.mtime):
+            if SWAP:
+                column.byteswap()
+            self.f.write(column.tobytes())
+        self.f.write(self.type)
+        if SWAP:
+            self.name_length.byteswap()
+        self.f.write(self.name_length.tobytes())
+        self.f.write(self.names)
+        self._reset()
+
+    def close(self):
+        self.flush()
+        self.f.write(ROWS.pack(0))
+
+
+def write_columnar(records, f, header=None):
+    writer = ColumnarWriter(f, header)
+    for record in records:
+        writer.add(*record)
+    writer.close()
+    return writer.count
+
+
+class TreeColumns:
+    """A loaded export: one array per column, names in a single buffer."""
+
+    def __init__(self, header=None):
+        self.header = header or {}
+        self.parent = array("q")
+        self.size = array("q")
+        self.mtime = array("d")
+        self.type = bytearray()
+        self.name_end = array("Q")  # End offset of each name in names
+        self.names = bytearray()
+
+    def __len__(self):
+        return len(self.type)
+
+    def name(self, i):
+        start = self.name_end[i - 1] if i else 0
+        return self.names[start:self.name_end[i]].decode("utf-8", "surrogateescape")
+
+    def node(self, i):
+        size = self.size[i]
+        mtime = self.mtime[i]
+        node = Node(
+            self.name(i),
+            None,
+            self.type[i] != FILE,
+            None if size < 0 else size,
+            mtime=None if math.isnan(mtime) else mtime,
+        )
+        node.denied = self.type[i] == DENIED
+        return node
+
+    def add(self, parent, name, kind, size, mtime):
+        encoded = name.encode("utf-8", "surrogateescape")
+        self.parent.append(parent)
+        self.size.append(-1 if size is None else size)
+        self.mtime.append(math.nan if mtime is None else mtime)
+        self.type.append(kind)
+        self.names += encoded
+        self.name_end.append(len(self.names))
+
+
+def _read_exact(f, n):
+    data = f.read(n)
+    if len(data) != n:
+        raise ValueError("Truncated tree export")
+    return data
+
+
+def _read_array(f, typecode, rows):
+    column = array(typecode)
+    column.frombytes(_read_exact(f, rows * column.itemsize))
+    if SWAP:
+        column.byteswap()
+    return column
+
+
+def read_columnar(f):
+    if f.read(len(MAGIC)) != MAGIC:
+        raise ValueError("Not a columnar tree export")
+    (length,) = ROWS.unpack(_read_exact(f, ROWS.size))
+    tree = TreeColumns(json.loads(_read_exact(f, length)))
+
+    while True:
+        (rows,) = ROWS.unpack(_read_exact(f, ROWS.size))
+        if not rows:
+            return tree
+
+        tree.parent += _read_array(f, "q", rows)
+        tree.size += _read_array(f, "q", rows)
+        tree.mtime += _read_array(f, "d", rows)
+        tree.type += _read_exact(f, rows)
+        lengths = _read_array(f, "I", rows)
+        tree.name_end += array("Q", accumulate(lengths, initial=len(tree.names)))[1:]
+        tree.names += _read_exact(f, sum(lengths))
+
+
+def read_ndjson(f):
+    tree = TreeColumns()
+    kinds = {name: kind for kind, name in enumerate(TYPE_NAMES)}
+    for line in f:
+        if line.strip():
+            r = json.loads(line)
+            tree.add(r["parent"], r["name"], kinds[r["type"]], r["size"], r["mtime"])
+    return tree
+
+
+def load_export(path):
+    """Load a columnar or NDJSON export, telling them apart by content."""
+    with open(path, "rb") as f:
+        if f.read(len(MAGIC)) == MAGIC:
+            f.seek(0)
+            return read_columnar(f)
+    with open(path, "r", encoding="utf8") as f:
+        return read_ndjson(f)
+
+
+def export_lines(tree, format_entry, denied_line, max_depth=None):
+    """Yield the ASCII tree of a loaded export, like stream_lines does."""
+    n = len(tree)
+    parent = tree.parent
+    depth = array("i", bytes(4 * n))
+    last_child = array("q", [-1]) * n
+    for i in range(1, n):
+        depth[i] = depth[parent[i]] + 1
+        last_child[parent[i]] = i
+
+    prefixes = [""]  # Prefix of the children of the folder at each depth
+    limit = None if max_depth is None else max_depth + 1
+    for i in range(n):
+        d = depth[i]
+        if limit is not None and d > limit:
+            continue
+
+        kind = tree.type[i]
+        if d:
+            last = last_child[parent[i]] == i
+            prefix = prefixes[d - 1]
+            yield prefix + (LAST if last else BRANCH) + format_entry(tree.node(i))
+            if kind != FILE:
+                del prefixes[d:]
+                prefixes.append(prefix + (SPACE if last else VERTICAL))
+
+        if kind == DENIED and (limit is None or d < limit):
+            yield prefixes[d] + denied_line
@@ -0,0 +1,269 @@
+import os
+import heapq
+from concurrent.futures import ThreadPoolExecutor
+
+# ASCII characters
+BRANCH = "|-- "
+LAST = "`-- "
+VERTICAL = "|   "
+SPACE = "    "
+
+
+def default_workers():
+    return min(32, (os.cpu_count() or 1) * 4)
+
+
+class Node:
+    """One entry of a scanned tree; ``children`` is None until a folder is listed."""
+
+    __slots__ = (
+        "name", "path", "is_dir", "size", "children", "denied",
+        "file_id", "total", "count", "mtime",
+    )
+
+    def __init__(self, name, path, is_dir, size=None, file_id=None, mtime=None):
+        self.name = name
+        self.path = path
+        self.is_dir = is_dir
+        self.size = size
+        self.mtime = mtime
+        self.children = None
+        self.denied = False
+        self.file_id = file_id  # (device, inode) of files with several hard links
+        self.total = None  # Folders: cumulative size, set by aggregate()
+        self.count = None  # Folders: cumulative file count, set by aggregate()
+
+
+def list_dir(node, show_hidden=False, with_sizes=True, follow_links=True, with_mtime=False):
+    """
+    Fill node.children from one os.scandir pass, sorted folders first.
+
+    DirEntry caches the file type from the directory listing, so only the
+    size needs a stat call, and only when sizes are wanted. with_mtime
+    stats folders too. With follow_links=False symlinks are sized and
+    listed as themselves.
+    """
+    children = []
+    try:
+        with os.scandir(node.path) as it:
+            for entry in it:
+                if not show_hidden and entry.name.startswith("."):
+                    continue
+
+                try:
+                    is_dir = entry.is_dir(follow_symlinks=follow_links)
+                except OSError:
+                    is_dir = False
+
+                size = file_id = mtime = None
+                if with_mtime or (with_sizes and not is_dir):
+                    try:
+                        st = entry.stat(follow_symlinks=follow_links)
+                        if not is_dir:
+                            size = st.st_size
+                            if st.st_nlink > 1:
+                                file_id = (st.st_dev, st.st_ino)
+                        if with_mtime:
+                            mtime = st.st_mtime
+                    except OSError:
+                        pass
+
+                children.append(Node(entry.name, entry.path, is_dir, size, file_id, mtime))
+    except PermissionError:
+        node.denied = True
+    except OSError:
+        pass  # Vanished or not listable, shown as an empty folder
+
+    children.sort(key=lambda n: (not n.is_dir, n.name.lower()))
+    node.children = children
+    return node
+
+
+def scan_tree(
+    path,
+    max_depth=None,
+    show_hidden=False,
+    with_sizes=True,
+    workers=None,
+    follow_links=True,
+):
+    """
+    Scan a tree level by level, listing all folders of a level concurrently.
+
+    Folders deeper than max_depth are shown but not listed, matching the
+    recursive walkers. Returns the root Node.
+    """
+    root = Node(os.path.basename(path) or path, str(path), True)
+    level = [root]
+    depth = 0
+
+    with ThreadPoolExecutor(workers or default_workers()) as pool:
+        while level and (max_depth is None or depth <= max_depth):
+            listed = pool.map(
+                lambda n: list_dir(n, show_hidden, with_sizes, follow_links),
+                level,
+            )
+            level = [c for node in listed for c in node.children if c.is_dir]
+            depth += 1
+
+    return root
+
+
+def aggregate(root):
+    """
+    Set .total and .count on every folder of a scanned tree, bottom-up.
+
+    Files with several hard links are only counted the first time one of
+    their names is seen, like du does.
+    """
+    seen = set()
+    # Iterative post-order so very deep trees cannot hit the recursion limit
+    stack = [(root, False)]
+    while stack:
+        node, children_done = stack.pop()
+        if not children_done:
+            stack.append((node, True))
+            stack.extend((c, False) for c in reversed(node.children or []) if c.is_dir)
+            continue
+
+        total = count = 0
+        for child in node.children or []:
+            if child.is_dir:
+                total += child.total
+                count += child.count
+            elif child.file_id is None or child.file_id not in seen:
+                if child.file_id is not None:
+                    seen.add(child.file_id)
+                total += child.size or 0
+                count += 1
+        node.total = total
+        node.count = count
+    return root
+
+
+def heaviest(root, n):
+    """The n folders below root with the largest cumulative size."""
+    def folders():
+        stack = [c for c in root.children or [] if c.is_dir]
+        while stack:
+            node = stack.pop()
+            yield node
+            stack.extend(c for c in node.children or [] if c.is_dir)
+
+    return heapq.nlargest(n, folders(), key=lambda node: node.total)
+
+
+def iter_lines(node, format_entry, denied_line, prefix="", max_depth=None, depth=0):
+    """Yield the ASCII tree lines below node, using the classic connectors."""
+    if node.denied:
+        yield prefix + denied_line
+        return
+
+    children = node.children or []
+    for i, child in enumerate(children):
+        last = i == len(children) - 1
+        yield prefix + (LAST if last else BRANCH) + format_entry(child)
+
+        if child.is_dir and child.children is not None:
+            if max_depth is not None and depth >= max_depth:
+                continue
+            yield from iter_lines(
+                child,
+                format_entry,
+                denied_line,
+                prefix + (SPACE if last else VERTICAL),
+                max_depth,
+                depth + 1,
+            )
+
+
+def stream_entries(
+    path,
+    max_depth=None,
+    show_hidden=False,
+    with_sizes=True,
+    workers=None,
+    follow_links=True,
+    with_mtime=False,
+    lister=list_dir,
+):
+    """
+    Yield (depth, last, node) for path and every entry below it, in the
+    order iter_lines(scan_tree(...)) would print them.
+
+    The root comes first with depth 0. Folders are yielded once they have
+    been listed, so node.denied is already set. Nothing is kept beyond the
+    folders on the current branch: whenever a folder is reached, its
+    subfolders are queued for listing on the thread pool so they are
+    usually ready by the time the walk gets to them. lister is called like
+    list_dir and may be swapped for a caching one.
+    """
+    root = Node(os.path.basename(path) or path, str(path), True)
+    if with_mtime:
+        try:
+            root.mtime = os.stat(path).st_mtime
+        except OSError:
+            pass
+    pool = ThreadPoolExecutor(workers or default_workers())
+
+    def submit(node):
+        return pool.submit(lister, node, show_hidden, with_sizes, follow_links, with_mtime)
+
+    def walk(node, depth):
+        children = node.children
+        descend = max_depth is None or depth < max_depth
+        pending = {
+            i: submit(child)
+            for i, child in enumerate(children)
+            if descend and child.is_dir
+        }
+
+        for i, child in enumerate(children):
+            future = pending.pop(i, None)
+            if future is not None:
+                future.result()
+            yield depth + 1, i == len(children) - 1, child
+
+            if future is not None:
+                yield from walk(child, depth + 1)
+
+    try:
+        submit(root).result()
+        yield 0, True, root
+        yield from walk(root, 0)
+    finally:
+        pool.shutdown(wait=False, cancel_futures=True)
+
+
+def stream_lines(
+    path,
+    format_entry,
+    denied_line,
+    max_depth=None,
+    show_hidden=False,
+    with_sizes=True,
+    workers=None,
+    lister=list_dir,
+):
+    """
+    Yield the tree lines below path while the folders are being read.
+
+    Output is the same as iter_lines(scan_tree(...)); see stream_entries.
+    """
+    prefixes = [""]  # Prefix of the children of the folder at each depth
+    entries = stream_entries(
+        path, max_depth, show_hidden, with_sizes, workers, lister=lister
+    )
+    try:
+        for depth, last, node in entries:
+            if depth:
+                prefix = prefixes[depth - 1]
+                yield prefix + (LAST if last else BRANCH) + format_entry(node)
+                if node.is_dir:
+                    del prefixes[depth:]
+                    prefixes.append(prefix + (SPACE if last else VERTICAL))
+
+            if node.denied:
+                yield prefixes[depth] + denied_line
+    finally:
+        entries.close()
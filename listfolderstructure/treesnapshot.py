@@ -0,0 +1,149 @@
+import os
+import time
+
+from treescan import Node
+
+ADDED = "+"
+REMOVED = "-"
+RESIZED = "~"
+
+# A folder changed this close to being listed may change again within the
+# same mtime tick, so its listing is not trusted next time
+RACY_NS = 2_000_000_000
+
+
+class TreeSnapshot:
+    """
+    The folder listings of the last completed scan of one root.
+
+    ``listings`` maps each listed folder to (mtime_ns, entries), entries
+    being (name, is_dir, size) tuples including hidden ones. A new scan
+    only runs os.scandir on folders whose mtime changed; for the others
+    the cached names are reused and the files are stat'ed again, since
+    rewriting a file does not touch its folder. Sizes are always recorded,
+    so diff() can report resized files whether or not they are shown.
+    """
+
+    def __init__(self, root):
+        self.root = str(root)
+        self.listings = {}
+        self.previous = None  # listings of the scan before, for diff()
+
+    def scan(self):
+        """A lister for stream_entries; call .commit() once the walk is done."""
+        return SnapshotScan(self)
+
+    def diff(self, show_hidden=False):
+        """
+        Yield (change, path, old size, new size) between the last two scans.
+
+        Only folders listed by both scans are compared, so a new or removed
+        folder is reported once rather than with everything inside it.
+        """
+        if self.previous is None:
+            return
+
+        for folder in sorted(self.listings.keys() & self.previous.keys()):
+            old = self.previous[folder][1]
+            new = self.listings[folder][1]
+            if old is None or new is None:
+                continue  # Could not be listed
+
+            old = {name: (is_dir, size) for name, is_dir, size in old}
+            for name, is_dir, size in new:
+                if not show_hidden and name.startswith("."):
+                    continue
+                path = os.path.join(folder, name)
+                before = old.pop(name, None)
+                if before is None or before[0] != is_dir:
+                    if before is not None:
+                        yield REMOVED, path, before[1], None
+                    yield ADDED, path, None, size
+                elif None not in (before[1], size) and before[1] != size:
+                    yield RESIZED, path, before[1], size
+
+            for name, (is_dir, size) in sorted(old.items()):
+                if show_hidden or not name.startswith("."):
+                    yield REMOVED, os.path.join(folder, name), size, None
+
+
+class SnapshotScan:
+    """Caching drop-in for treescan.list_dir, filling one new set of listings."""
+
+    def __init__(self, snapshot):
+        self.snapshot = snapshot
+        self.cached = snapshot.listings
+        self.listings = {}
+        self.relisted = 0
+
+    def __call__(self, node, show_hidden=False, with_sizes=True, follow_links=True, with_mtime=False):
+        try:
+            mtime = os.stat(node.path).st_mtime_ns
+        except OSError:
+            node.children = []
+            return node
+
+        cached = self.cached.get(node.path)
+        if cached is not None and cached[0] == mtime:
+            entries = cached[1]
+            if entries is not None:
+                entries = [
+                    (name, is_dir, size if is_dir else self._size(node.path, name, follow_links))
+                    for name, is_dir, size in entries
+                ]
+        else:
+            entries = self._list(node.path, follow_links)
+            self.relisted += 1
+            if time.time_ns() - mtime < RACY_NS:
+                mtime = None
+
+        self.listings[node.path] = (mtime, entries)
+
+        if entries is None:
+            node.denied = True
+            entries = []
+
+        children = [
+            Node(name, os.path.join(node.path, name), is_dir, size if with_sizes else None)
+            for name, is_dir, size in entries
+            if show_hidden or not name.startswith(".")
+        ]
+        children.sort(key=lambda n: (not n.is_dir, n.name.lower()))
+        node.children = children
+        return node
+
+    def commit(self):
+        snapshot = self.snapshot
+        snapshot.previous, snapshot.listings = snapshot.listings, self.listings
+
+    @staticmethod
+    def _size(folder, name, follow_links):
+        try:
+            return os.stat(os.path.join(folder, name), follow_symlinks=follow_links).st_size
+        except OSError:
+            return None
+
+    @staticmethod
+    def _list(path, follow_links):
+        """(name, is_dir, size) for every entry of path, None if access is denied."""
+        entries = []
+        try:
+            with os.scandir(path) as it:
+                for entry in it:
+                    try:
+                        is_dir = entry.is_dir(follow_symlinks=follow_links)
+                    except OSError:
+                        is_dir = False
+
+                    size = None
+                    if not is_dir:
+                        try:
+                            size = entry.stat(follow_symlinks=follow_links).st_size
+                        except OSError:
+                            pass
+                    entries.append((entry.name, is_dir, size))
+        except PermissionError:
+            return None
+        except OSError:
+            pass  # Vanished or not listable, shown as an empty folder
+        return entries
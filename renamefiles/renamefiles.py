@@ -1,43 +1,102 @@
 import os
 import argparse
+from concurrent.futures import ThreadPoolExecutor
+
+from renameplan import JOURNAL_NAME, Journal, plan_renames, execute, recover
+from sortkeys import SORT_KEYS, sort_files, check_available
+
+
+def default_workers():
+    return min(32, (os.cpu_count() or 1) * 4)
+
+
+def plan_folder(root, files, padding):
+    """Plan the renames of one folder's files, already in their new order."""
+    if not files:
+        return None
+
+    # Determine padding automatically if not given
+    total_files = len(files)
+    if padding == 0:
+        pad = len(str(total_files))
+    else:
+        pad = padding
+
+    mapping = {
+        filename: f"{str(idx).zfill(pad)}{os.path.splitext(filename)[1]}"
+        for idx, filename in enumerate(files, start=1)
+    }
+
+    # A target held by something that is not renamed (e.g. a folder) would be overwritten
+    others = set(os.listdir(root)) - set(files)
+    blocked = others & set(mapping.values())
+    if blocked:
+        print(f"Skipped {root}: {', '.join(sorted(blocked))} already exist")
+        return None
+
+    ops, checkpoints = plan_renames(mapping, set(files) | others)
+    return root, mapping, ops, checkpoints
+
+
+def rename_folder(plan, journal):
+    root, mapping, ops, checkpoints = plan
+    execute(root, ops, checkpoints, journal)
+
+    lines = [
+        f"Renamed: {os.path.join(root, old)} -> {os.path.join(root, new)}"
+        for old, new in mapping.items()
+        if old != new
+    ]
+    if lines:
+        print("\n".join(lines))
+
+
+def rename_files_in_folder(folder_path, recursive=False, padding=0, workers=None, sort="name"):
+    """
+    Number the files of a folder (and its subfolders) 1, 2, 3... in sort
+    order (see sortkeys.SORT_KEYS). Every folder is planned before the
+    first file is renamed.
+
+    Files whose target name is free are renamed in place; temporary names
+    are only used to break cycles (e.g. swapping 1.jpg and 2.jpg). Progress
+    goes to a journal in folder_path, so an interrupted run is finished by
+    the next one. Subfolders are renamed in parallel when recursive.
+    """
+    journal_path = os.path.join(folder_path, JOURNAL_NAME)
+    if os.path.exists(journal_path):
+        count = recover(journal_path)
+        print(f"Finished an interrupted run ({count} renames); run again to renumber")
+        return
 
-def rename_files_in_folder(folder_path, recursive=False, padding=0):
     if recursive:
         walker = os.walk(folder_path)
     else:
         walker = [(folder_path, [], [f for f in os.listdir(folder_path) if os.path.isfile(os.path.join(folder_path, f))])]
 
-    for root, _, files in walker:
-        files.sort()
-
-        if not files:
-            continue
-
-        # Determine padding automatically if not given
-        total_files = len(files)
-        if padding == 0:
-            pad = len(str(total_files))
-        else:
-            pad = padding
-
-        # Step 1: rename to temporary names
-        temp_names = []
-        for idx, filename in enumerate(files, start=1):
-            ext = os.path.splitext(filename)[1]
-            temp_name = f"__temp_{idx}{ext}"
-            old_path = os.path.join(root, filename)
-            temp_path = os.path.join(root, temp_name)
-            os.rename(old_path, temp_path)
-            temp_names.append(temp_name)
-
-        # Step 2: rename to final numbered names
-        for idx, temp_name in enumerate(temp_names, start=1):
-            ext = os.path.splitext(temp_name)[1]
-            new_name = f"{str(idx).zfill(pad)}{ext}"
-            old_path = os.path.join(root, temp_name)
-            new_path = os.path.join(root, new_name)
-            os.rename(old_path, new_path)
-            print(f"Renamed: {old_path} -> {new_path}")
+    folders = [
+        (root, [f for f in files if root != folder_path or f != JOURNAL_NAME])
+        for root, _, files in walker
+    ]
+    sort_files(folders, sort, workers)
+    plans = [plan for plan in (plan_folder(root, files, padding) for root, files in folders) if plan]
+
+    journal = Journal(journal_path)
+    failed = False
+    try:
+        with ThreadPoolExecutor((workers or default_workers()) if recursive else 1) as pool:
+            futures = [pool.submit(rename_folder, plan, journal) for plan in plans]
+
+            for future in futures:
+                try:
+                    future.result()
+                except OSError as e:
+                    failed = True
+                    print(f"Failed: {e}")
+    except BaseException:
+        journal.close(remove=False)
+        raise
+    # Kept for recovery when anything went wrong
+    journal.close(remove=not failed)
 
 
 def main():
@@ -48,9 +107,17 @@ def main():
     parser.add_argument("-r", "--recursive", action="store_true", help="Include subfolders")
     parser.add_argument("-p", "--padding", type=int, default=0,
                         help="Number of digits for zero-padding (default auto based on file count)")
+    parser.add_argument("--workers", type=int, help="Folders renamed in parallel when recursive")
+    parser.add_argument("-s", "--sort", choices=SORT_KEYS, default="name",
+                        help="Order of the new numbers: name, natural (img2 before img10), "
+                             "mtime, exif (DateTimeOriginal) or duration (needs ffprobe)")
 
     args = parser.parse_args()
-    rename_files_in_folder(args.folder, args.recursive, args.padding)
+    try:
+        check_available(args.sort)
+    except RuntimeError as e:
+        parser.error(str(e))
+    rename_files_in_folder(args.folder, args.recursive, args.padding, args.workers, args.sort)
 
 
 if __name__ == "__main__":
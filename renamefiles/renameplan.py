@@ -0,0 +1,157 @@
+import os
+import json
+import threading
+
+JOURNAL_NAME = ".renamefiles-journal"
+
+
+def plan_renames(mapping, existing):
+    """
+    Order the renames of mapping (old name -> new name) so nothing is overwritten.
+
+    The mapping is a permutation plus renames to free names, i.e. chains
+    and cycles. A chain is renamed from its free end backwards, each
+    rename freeing the name the next one needs; only a cycle has no free
+    end, so one of its files is parked under a temporary name first.
+
+    existing is every name in the folder. Returns (ops, checkpoints):
+    ops is the ordered list of (src, dst), checkpoints the op counts after
+    which a cycle is complete.
+    """
+    pending = {src: dst for src, dst in mapping.items() if src != dst}
+    sources = {dst: src for src, dst in pending.items()}
+    taken = set(existing) | set(pending.values())
+    ops = []
+    checkpoints = []
+
+    def unwind(src, dst):
+        # Rename src to the free dst, then whoever wanted src, and so on
+        while src is not None and src in pending:
+            del pending[src]
+            ops.append((src, dst))
+            dst = src
+            src = sources.get(src)
+
+    for src, dst in list(pending.items()):
+        if src in pending and dst not in pending:
+            unwind(src, dst)
+
+    counter = 0
+    while pending:
+        start = next(iter(pending))
+        ext = os.path.splitext(start)[1]
+        while True:
+            counter += 1
+            temp = f"__temp_{counter}{ext}"
+            if temp not in taken:
+                break
+        taken.add(temp)
+
+        final = pending.pop(start)
+        ops.append((start, temp))
+        unwind(sources[start], start)
+        ops.append((temp, final))
+        checkpoints.append(len(ops))
+
+    return ops, checkpoints
+
+
+class Journal:
+    """
+    Append-only record of a rename run, for finishing it after a crash.
+
+    Each folder's full plan is written before its first rename, a line
+    once each cycle's file is parked, and a progress line after every
+    cycle and at the end. Renames inside a chain or cycle are safe to
+    replay: once done, their target stays taken. Parking is not, since a
+    finished cycle refills the name it parked, so a parked cycle whose
+    temporary name is gone counts as done.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self.f = open(path, "a", encoding="utf8")
+        self.lock = threading.Lock()
+
+    def write(self, record):
+        with self.lock:
+            self.f.write(json.dumps(record) + "\n")
+            self.f.flush()
+
+    def close(self, remove=True):
+        self.f.close()
+        if remove:
+            os.remove(self.path)
+
+
+def cycle_parks(ops, checkpoints):
+    """{op count of each cycle's parking rename: op count ending that cycle}."""
+    parks = {}
+    for end in checkpoints:
+        temp = ops[end - 1][0]
+        start = end - 1
+        while ops[start - 1][1] != temp:
+            start -= 1
+        parks[start] = end
+    return parks
+
+
+def execute(folder, ops, checkpoints, journal):
+    """Run the planned renames of one folder, journaling progress."""
+    journal.write({"dir": folder, "ops": ops, "checkpoints": checkpoints})
+    marks = set(checkpoints)
+    parks = cycle_parks(ops, checkpoints)
+    for i, (src, dst) in enumerate(ops, start=1):
+        os.rename(os.path.join(folder, src), os.path.join(folder, dst))
+        if i in marks:
+            journal.write({"dir": folder, "done": i})
+        elif i in parks:
+            journal.write({"dir": folder, "parked": i})
+    journal.write({"dir": folder, "done": len(ops)})
+
+
+def recover(journal_path):
+    """
+    Finish the renames of an interrupted run from its journal.
+
+    Everything past the last checkpoint of a folder is replayed when its
+    source still exists and its target does not, except cycles that were
+    parked and whose temporary file is gone again: those finished. Returns
+    the number of renames done.
+    """
+    plans = {}
+    done = {}
+    parked = {}
+    with open(journal_path, "r", encoding="utf8") as f:
+        for line in f:
+            try:
+                record = json.loads(line)
+            except ValueError:
+                break  # Torn last line
+            if "ops" in record:
+                plans[record["dir"]] = (record["ops"], record.get("checkpoints", []))
+                done[record["dir"]] = 0
+                parked[record["dir"]] = set()
+            elif "parked" in record:
+                parked[record["dir"]].add(record["parked"])
+            else:
+                done[record["dir"]] = record["done"]
+
+    count = 0
+    for folder, (ops, checkpoints) in plans.items():
+        parks = cycle_parks(ops, checkpoints)
+        i = done[folder]
+        while i < len(ops):
+            src, dst = ops[i]
+            i += 1
+            if i in parked[folder] and not os.path.lexists(os.path.join(folder, dst)):
+                i = parks[i]  # Parked and restored: the whole cycle is done
+                continue
+            src = os.path.join(folder, src)
+            dst = os.path.join(folder, dst)
+            if os.path.lexists(src) and not os.path.lexists(dst):
+                os.rename(src, dst)
+                count += 1
+
+    os.remove(journal_path)
+    return count
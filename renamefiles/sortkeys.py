@@ -0,0 +1,180 @@
+import os
+import re
+import json
+import sqlite3
+import subprocess
+from concurrent.futures import ThreadPoolExecutor
+
+try:
+    from PIL import Image
+except ImportError:
+    Image = None
+
+CACHE_DB = os.path.join(os.path.expanduser("~"), ".cache", "filetools", "renamefiles", "metadata.sqlite")
+
+EXIF_IFD = 0x8769
+DATETIME_ORIGINAL = 36867
+DATETIME = 306
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS metadata (
+    dev INTEGER NOT NULL,
+    ino INTEGER NOT NULL,
+    key TEXT NOT NULL,
+    size INTEGER NOT NULL,
+    mtime_ns INTEGER NOT NULL,
+    value TEXT NOT NULL,
+    PRIMARY KEY (dev, ino, key)
+);
+"""
+
+
+def natural_key(name):
+    """img2 before img10: digit runs compare as numbers."""
+    # Odd parts are the digit runs; isdigit() would also take "²", which int() rejects
+    return tuple(
+        int(part) if i % 2 else part.lower()
+        for i, part in enumerate(re.split(r"(\d+)", name))
+    )
+
+
+def read_exif_date(path):
+    """EXIF DateTimeOriginal (or DateTime) as "YYYY:MM:DD HH:MM:SS", None if absent."""
+    try:
+        with Image.open(path) as img:
+            exif = img.getexif()
+            value = exif.get_ifd(EXIF_IFD).get(DATETIME_ORIGINAL) or exif.get(DATETIME)
+    except Exception:
+        return None  # Not an image, or unreadable
+    if not value:
+        return None
+    return str(value).strip("\x00 ") or None
+
+
+def read_duration(path):
+    """Media duration in seconds from ffprobe, None for files without one."""
+    cmd = [
+        "ffprobe",
+        "-v", "error",
+        "-show_entries", "format=duration",
+        "-of", "default=noprint_wrappers=1:nokey=1",
+        path,
+    ]
+    result = subprocess.run(cmd, stdout=subprocess.PIPE, stderr=subprocess.DEVNULL, text=True)
+    try:
+        return float(result.stdout.strip())
+    except ValueError:
+        return None
+
+
+# Sort keys that need file contents; read in parallel and cached
+READERS = {
+    "exif": read_exif_date,
+    "duration": read_duration,
+}
+SORT_KEYS = ("name", "natural", "mtime") + tuple(READERS)
+
+
+def check_available(key):
+    """Raise RuntimeError when the sort key needs a missing tool."""
+    if key == "exif" and Image is None:
+        raise RuntimeError("Sorting by EXIF date needs Pillow (pip install pillow)")
+    if key == "duration":
+        try:
+            subprocess.run(["ffprobe", "-version"], stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+        except FileNotFoundError:
+            raise RuntimeError("Sorting by duration needs ffprobe on the PATH") from None
+
+
+class MetadataCache:
+    """
+    Persistent per-file metadata, keyed by (device, inode) so that it
+    survives the renames themselves; a changed size or mtime invalidates
+    the record.
+    """
+
+    def __init__(self, db_path=CACHE_DB):
+        os.makedirs(os.path.dirname(db_path), exist_ok=True)
+        self.db = sqlite3.connect(db_path)
+        self.db.executescript(SCHEMA)
+
+    def close(self):
+        self.db.commit()
+        self.db.close()
+
+    def values(self, paths, key, workers=None):
+        """{path: metadata} for paths, reading only uncached files, in parallel."""
+        values = {}
+        missing = []
+        for path in paths:
+            try:
+                st = os.stat(path)
+            except OSError:
+                values[path] = None
+                continue
+            row = self.db.execute(
+                "SELECT value FROM metadata WHERE dev = ? AND ino = ? AND key = ? AND size = ? AND mtime_ns = ?",
+                (st.st_dev, st.st_ino, key, st.st_size, st.st_mtime_ns),
+            ).fetchone()
+            if row is not None:
+                values[path] = json.loads(row[0])
+            else:
+                missing.append((path, st))
+
+        reader = READERS[key]
+        with ThreadPoolExecutor(workers or min(32, (os.cpu_count() or 1) * 2)) as pool:
+            results = pool.map(reader, [path for path, _ in missing])
+            for (path, st), value in zip(missing, results):
+                values[path] = value
+                self.db.execute(
+                    "INSERT OR REPLACE INTO metadata VALUES (?, ?, ?, ?, ?, ?)",
+                    (st.st_dev, st.st_ino, key, st.st_size, st.st_mtime_ns, json.dumps(value)),
+                )
+
+        self.db.commit()
+        return values
+
+
+def sort_files(folders, key, workers=None):
+    """
+    Sort the file lists of [(root, files)] in place by key (see SORT_KEYS).
+
+    Ties, and files without the metadata (sorted last), fall back to
+    natural name order.
+    """
+    if key == "name":
+        for _, files in folders:
+            files.sort()
+        return
+
+    if key == "natural":
+        for _, files in folders:
+            files.sort(key=natural_key)
+        return
+
+    if key == "mtime":
+        def value(path):
+            try:
+                return os.stat(path).st_mtime
+            except OSError:
+                return None
+        metadata = {
+            os.path.join(root, f): value(os.path.join(root, f))
+            for root, files in folders for f in files
+        }
+    else:
+        cache = MetadataCache()
+        try:
+            metadata = cache.values(
+                [os.path.join(root, f) for root, files in folders for f in files],
+                key,
+                workers,
+            )
+        finally:
+            cache.close()
+
+    for root, files in folders:
+        def order(name):
+            v = metadata[os.path.join(root, name)]
+            return (v is None, v if v is not None else 0, natural_key(name))
+        files.sort(key=order)